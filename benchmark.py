@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+
+# measure how fast the simulation kernels run
+# everything runs headless, nothing here needs pyglet or a window
+
+
+
+### CONFIG
+
+MIN_TIME = 0.2 # keep calling a kernel until at least this many seconds have passed
+REPEAT = 3 # take the best of this many timing runs
+REGRESSION = 0.1 # fractional slowdown against the baseline that counts as a regression
+OUTPUT_FILE_NAME = 'benchmark.json'
+
+
+
+### IMPORTS
+
+import os
+import sys
+import json
+import time
+import platform
+import tempfile
+import tracemalloc
+import numpy as np
+
+
+
+### KERNELS
+
+# each kernel takes a problem size and returns a function to time and the amount of work one call does
+
+def fluid_step(size):
+    from waves import fluid
+    simulation = fluid.Simulation((size, size))
+    return simulation.step, size * size
+
+def fluid_draw(size):
+    from waves import fluid
+    simulation = fluid.Simulation((size, size))
+    buffer_size = size * size * 4
+    return lambda: simulation.draw(buffer_size), 1
+
+def string1_wave_sum(size):
+    from waves import string1
+    xs = [i / size for i in range(size + 1)]
+    t = 0.5
+    return lambda: [string1.wave_function(x, t) for x in xs], size + 1
+
+def string2_update(size):
+    from waves import string2
+    string = string2.String(size, lambda t: ((t % 1) * 2 - 1) * 0.25)
+    t = 0
+    def update():
+        nonlocal t
+        string.update(t, 1 / 60)
+        t += 1 / 60
+    return update, 1
+
+def string3_update(size):
+    from waves import string3
+    string = string3.String(size, lambda t: ((t * 0.12 % 1) * 2 - 1) * 0.5)
+    t = 0
+    def update():
+        nonlocal t
+        string.update(t)
+        t += 1 / 60
+    return update, 1
+
+def modal_spring(size):
+    from waves import string2, modal
+    string = string2.String(size, lambda t: 0.1)
+    modes = modal.SpringModes(size)
+    return lambda: modes.fast_forward(string, 10 ** 6, 0), 10 ** 6
+
+def resample_polyphase(size):
+    from waves.resample import Resampler
+    plot = np.sin(np.arange(size) * 0.01)
+    resampler = Resampler(44100, 48000)
+    return lambda: resampler(plot), size
+
+def spring_plot(size):
+    from waves import spring
+    from waves.resample import TimeBase
+    domain = TimeBase(size, spring.SAMPLE_RATE) # what spring_point_plot.py steps over
+    model = spring.plot(lambda t: (1 - t * 110 % 1 * 2) * .4, domain)
+    simulation = spring.Simulation(model)
+    return lambda: simulation.plot(domain), size
+
+# one temporary directory for the files the kernels write, removed when the benchmark exits
+scratch_directory = None
+
+def scratch(name):
+    ''' return the path of a scratch file, the same for every setup so reruns overwrite it '''
+    global scratch_directory
+    if scratch_directory is None:
+        scratch_directory = tempfile.TemporaryDirectory(prefix='waves-benchmark-')
+    return os.path.join(scratch_directory.name, name)
+
+def spring_save_plot(size):
+    from waves import spring
+    domain = np.arange(size) / spring.SAMPLE_RATE
+    model = spring.plot(lambda t: (1 - t * 110 % 1 * 2) * .4, domain)
+    filename = scratch('save.wav')
+    return lambda: spring.save_plot(model, filename), size
+
+def spring_load_plot(size):
+    from waves import spring
+    domain = np.arange(size) / spring.SAMPLE_RATE
+    model = spring.plot(lambda t: (1 - t * 110 % 1 * 2) * .4, domain)
+    filename = scratch('load.wav')
+    spring.save_plot(model, filename)
+    return lambda: spring.load_plot(filename), size
+
+# name: (kernel, size ladder, throughput unit, throughput scale)
+KERNELS = {
+    'fluid.step':        (fluid_step,       (16, 32, 64, 128, 512),    'MLUPS',          1e-6),
+    'fluid.draw':        (fluid_draw,       (16, 32, 64, 128, 512),    'frames/sec',     1),
+    'string1.wave_sum':  (string1_wave_sum, (100, 500, 2000),          'samples/sec',    1),
+    'string2.update':    (string2_update,   (100, 500, 2000),          'updates/sec',    1),
+    'string3.update':    (string3_update,   (100, 500, 2000),          'frames/sec',     1),
+    'modal.spring':      (modal_spring,     (100, 500, 2000),          'steps/sec',      1),
+    'resample':          (resample_polyphase, (4410, 22050, 88200),    'samples/sec',    1),
+    'spring.plot':       (spring_plot,      (4410, 22050, 88200),      'samples/sec',    1),
+    'spring.save_plot':  (spring_save_plot, (4410, 22050, 88200),      'samples/sec',    1),
+    'spring.load_plot':  (spring_load_plot, (4410, 22050, 88200),      'samples/sec',    1),
+}
+
+
+
+### BENCHMARK STUFF
+
+def measure(func, min_time=MIN_TIME, repeat=REPEAT):
+    ''' return the best time in seconds of a single call to func '''
+
+    # figure out how many calls it takes to fill min_time
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for i in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops = max(loops * 2, int(loops * min_time / max(elapsed, 1e-9)))
+
+    # then take the best of a few runs
+    best = elapsed / loops
+    for i in range(repeat - 1):
+        start = time.perf_counter()
+        for i in range(loops):
+            func()
+        best = min(best, (time.perf_counter() - start) / loops)
+    return best
+
+def peak_memory(kernel, size):
+    ''' return the peak number of bytes allocated while setting up and calling a kernel once '''
+    tracemalloc.start()
+    try:
+        func, work = kernel(size)
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def scaling(sizes, seconds):
+    ''' return the exponent p of the best fit seconds ~ size ** p '''
+    if len(sizes) < 2:
+        return None
+    return float(np.polyfit(np.log(sizes), np.log(seconds), 1)[0])
+
+def run(names, min_time=MIN_TIME, repeat=REPEAT, sizes=None):
+    ''' benchmark the named kernels over their size ladders, returning a json friendly report '''
+    results = dict()
+    for name in names:
+        kernel, ladder, unit, scale = KERNELS[name]
+        ladder = sizes or ladder
+        rows = list()
+        for size in ladder:
+            func, work = kernel(size)
+            seconds = measure(func, min_time, repeat)
+            rows.append({
+                'size': size,
+                'seconds': seconds,
+                'throughput': work / seconds * scale,
+                'unit': unit,
+                'peak_bytes': peak_memory(kernel, size),
+                })
+            print(f'{name:18} size={size:<8} {rows[-1]["throughput"]:14.3f} {unit:12} '
+                  f'{seconds * 1000:10.3f} ms  {rows[-1]["peak_bytes"] / 1024:10.1f} KiB')
+        results[name] = {
+            'rows': rows,
+            'scaling': scaling([row['size'] for row in rows], [row['seconds'] for row in rows]),
+            }
+        if results[name]['scaling'] is not None:
+            print(f'{name:18} time ~ size ** {results[name]["scaling"]:.2f}')
+    return {
+        'meta': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            },
+        'results': results,
+        }
+
+def compare(report, baseline, threshold=REGRESSION):
+    ''' print the speedup of a report against a baseline report, returning the list of regressions '''
+    regressions = list()
+    for name, result in report['results'].items():
+        if name not in baseline['results']:
+            continue
+        old_rows = {row['size']: row for row in baseline['results'][name]['rows']}
+        for row in result['rows']:
+            old = old_rows.get(row['size'])
+            if not old:
+                continue
+            speedup = old['seconds'] / row['seconds']
+            flag = ''
+            if speedup < 1 - threshold:
+                flag = '  REGRESSION'
+                regressions.append((name, row['size'], speedup))
+            print(f'{name:18} size={row["size"]:<8} {speedup:8.2f}x{flag}')
+    return regressions
+
+
+
+### MAIN
+
+def main():
+    ''' run the benchmarks from the command line '''
+    import argparse
+    parser = argparse.ArgumentParser(description='benchmark the simulation kernels')
+    parser.add_argument('kernels', nargs='*', help=f'kernels to run (default all): {", ".join(KERNELS)}')
+    parser.add_argument('--sizes', type=lambda s: tuple(map(int, s.split(','))), help='override the size ladder, comma separated')
+    parser.add_argument('--min-time', type=float, default=MIN_TIME, help='minimum seconds to spend timing each size')
+    parser.add_argument('--repeat', type=int, default=REPEAT, help='take the best of this many runs')
+    parser.add_argument('--output', default=OUTPUT_FILE_NAME, help='where to write the json results')
+    parser.add_argument('--baseline', help='a previous json results file to compare against')
+    parser.add_argument('--threshold', type=float, default=REGRESSION, help='slowdown fraction that counts as a regression')
+    args = parser.parse_args()
+
+    names = args.kernels or list(KERNELS)
+    for name in names:
+        if name not in KERNELS:
+            parser.error(f'unknown kernel {name!r}')
+
+    report = run(names, args.min_time, args.repeat, args.sizes)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'wrote results to {args.output}')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f'comparing against {args.baseline}...')
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+if __name__ == '__main__': main()
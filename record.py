@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+# record a front end to a video or a png sequence without opening a window
+# frames are drawn with the same draw functions the front ends use, just onto a numpy canvas,
+# so this runs on servers without a display and as fast as the simulation and encoder allow
+#
+# the y4m output can be compressed afterwards, e.g. ffmpeg -i fluid.y4m fluid.mp4
+
+
+
+### CONFIG
+
+SCENES = 'fluid', 'string1', 'string2', 'string3' # front end modules that can be recorded
+DURATION = 10 # default seconds of animation to record
+
+
+
+### IMPORTS
+
+import sys
+import time
+import importlib
+from waves import timing
+from waves import raster
+from waves import record
+from waves.scenario import load
+
+
+
+### RECORDING
+
+def frames(front_end, size, fps, count, scenario=None):
+    ''' yield count rendered rgb frames of a front end, stepped on a fixed clock so runs are reproducible '''
+    canvas = raster.Canvas(*size)
+    state = front_end.setup(scenario)
+    dt = 1 / fps
+    for i in range(count):
+        t = i * dt
+        front_end.update(state, t, dt)
+        canvas.clear()
+        front_end.draw(canvas, state, t, raster)
+        yield canvas.image
+
+def run(scene, output, size=None, fps=None, duration=DURATION, workers=record.WORKERS, backlog=record.BACKLOG, scenario=None):
+    ''' record a scene to output and return the number of frames written, set up from a scenario if given '''
+    if scenario and scenario.solver != scene:
+        raise ValueError(f'a {scenario.solver} scenario cannot be recorded as {scene}')
+    front_end = importlib.import_module(scene)
+    size = size or front_end.SCREEN_SIZE
+    fps = fps or front_end.FPS
+    count = round(duration * fps)
+    with record.Recorder(record.writer(output, *size, fps), workers, backlog) as recorder:
+        for image in frames(front_end, size, fps, count, scenario):
+            with timing.stage('record.frame'):
+                recorder.add(image)
+    return count
+
+
+
+### MAIN
+
+def main():
+    ''' record a scene from the command line '''
+    import argparse
+    parser = argparse.ArgumentParser(description='record a simulation to a .y4m video or a directory of pngs')
+    parser.add_argument('scene', choices=SCENES, help='which front end to record')
+    parser.add_argument('output', help='a .y4m file, or a directory for a png sequence')
+    parser.add_argument('--scenario', help='a json scenario file to set the scene up from')
+    parser.add_argument('--duration', type=float, default=DURATION, help='seconds of animation to record')
+    parser.add_argument('--fps', type=int, help="frames per second (default the front end's)")
+    parser.add_argument('--size', type=lambda s: tuple(map(int, s.split('x'))), help="frame size as WIDTHxHEIGHT (default the front end's)")
+    parser.add_argument('--workers', type=int, default=record.WORKERS, help='number of encoding threads')
+    parser.add_argument('--backlog', type=int, default=record.BACKLOG, help='most frames in flight at once')
+    parser.add_argument('--profile', action='store_true', help='print per stage timings at the end')
+    args = parser.parse_args()
+
+    if args.profile: timing.enable()
+    start = time.perf_counter()
+    scenario = load(args.scenario) if args.scenario else None
+    if scenario and scenario.solver != args.scene:
+        parser.error(f'{args.scenario} is a {scenario.solver} scenario, not {args.scene}')
+    count = run(args.scene, args.output, args.size, args.fps, args.duration, args.workers, args.backlog, scenario)
+    elapsed = time.perf_counter() - start
+    print(f'wrote {count} frames to {args.output} in {elapsed:.2f}s ({count / elapsed:.1f} fps)', file=sys.stderr)
+    if timing.enabled: print('\n'.join(timing.summary()), file=sys.stderr)
+
+if __name__ == '__main__': main()
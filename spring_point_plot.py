@@ -1,204 +1,152 @@
 #!/usr/bin/env python3
 
 # try to replicate a model wave using a spring force simulation
+# this is the command line front end, the simulation itself lives in waves.spring
 
 
 
 ### CONFIG
 
-import numpy as np
-import math
-
 SCREEN_SIZE = 800, 400
-SAMPLE_RATE = 44100
 FPS = 60
 ORIGIN_COLOR =  (63, 63, 63) # color of the line through the middle of the screen
 MODEL_COLOR =   (255, 0, 0) # color of the perfect model
 REPLICA_COLOR = (0, 255, 0) # color of the replica
-DOMAIN = np.arange(0, 4, 1/SAMPLE_RATE) # domain of the plot
 DISPLAY_TIME_WINDOW = .05 # display this many seconds worth of samples
-SPRING_STRENGTH = lambda t: 20000000 * (math.sin(t * 2 * math.pi) * 0.75 + 1)
-SPRING_DAMPING = lambda t: 100000000 * (math.cos(t * 2 * math.pi) * 0.75 + 1)
 SYNC_SCOPE = True
 MODEL_FILE_NAME = 'out_model.wav'
 SIMULATION_FILE_NAME = 'out_simulation.wav'
+SWEEP_STRENGTHS = '1e6:1e8:9' # log spaced grid of base spring strengths to sweep (start:stop:count)
+SWEEP_DAMPINGS = '1e6:1e9:10' # log spaced grid of base spring dampings to sweep (start:stop:count)
+SWEEP_TOP = 10 # how many of the best candidates to report
+
+
+
+### IMPORTS
+
+import os
+from waves import timing
+from waves.spring import SAMPLE_RATE, INTEGRATORS, save_plot
+from waves.resample import TimeBase
+from waves.scenario import Scenario, load
+from waves.sweep import Sweep, grid, log_range, SWEEP_DEPTH, SWEEP_ROUNDS
+
+
+
+### MAIN
+
+def main():
+    ''' plot the model and its replica, then either show them or search for better springs '''
+    import argparse
+    parser = argparse.ArgumentParser(description='replicate a model wave using a spring force simulation')
+    parser.add_argument('model', nargs='?', help='a .wav file to use as the model instead of a sawtooth')
+    parser.add_argument('--scenario', help='a json scenario file giving the model, springs and integrator')
+    parser.add_argument('--sweep', action='store_true', help='evaluate a grid of spring schedules instead of displaying')
+    parser.add_argument('--fit', action='store_true', help='like --sweep but keep refining around the best schedule')
+    parser.add_argument('--strengths', default=SWEEP_STRENGTHS, help='base spring strengths as start:stop:count')
+    parser.add_argument('--dampings', default=SWEEP_DAMPINGS, help='base spring dampings as start:stop:count')
+    parser.add_argument('--depth', type=float, default=SWEEP_DEPTH, help='modulation depth of the schedules')
+    parser.add_argument('--rounds', type=int, default=SWEEP_ROUNDS, help='refinement rounds for --fit')
+    parser.add_argument('--metric', default='rms', choices=('rms', 'peak'), help='error metric to rank by')
+    parser.add_argument('--integrator', choices=INTEGRATORS, help="how to step the replica (default the scenario's)")
+    parser.add_argument('--rate', type=float, help='step the replica at this sample rate and resample the result')
+    parser.add_argument('--duration', type=float, help='only use this many seconds of the model')
+    parser.add_argument('--processes', type=int, help='number of worker processes')
+    parser.add_argument('--top', type=int, default=SWEEP_TOP, help='how many results to report')
+    parser.add_argument('--profile', action='store_true', help='print how long integrating and file i/o took')
+    args = parser.parse_args()
+    if args.profile: timing.enable()
+
+    # the built in scenario is a sawtooth, unless a wav file was specified for loading!
+    scenario = load(args.scenario) if args.scenario else Scenario('spring')
+    if args.model: scenario.settings['model'] = os.path.abspath(args.model) # relative to here, not the scenario file
+    if args.duration: scenario.settings['duration'] = args.duration
+    if args.integrator: scenario.settings['integrator'] = args.integrator
+    if args.rate: scenario.settings['rate'] = args.rate
+
+    # the model comes out of the cache if this scenario has been plotted before
+    if isinstance(scenario['model'], str):
+        print(f"loading model from {scenario.path(scenario['model'])}...")
+    else:
+        print('plottng model...')
+    model_plot, simulation = scenario.build()
+
+    if args.sweep or args.fit:
+        strengths = log_range(args.strengths)
+        dampings = log_range(args.dampings)
+        with Sweep(model_plot, args.processes, args.metric, scenario['integrator'], scenario['rate']) as sweep:
+            if args.fit:
+                print(f'fitting spring schedules over {args.rounds + 1} rounds...')
+                results = sweep.fit(strengths, dampings, args.depth, args.rounds)
+            else:
+                print(f'sweeping {len(strengths) * len(dampings)} spring schedules...')
+                results = sweep.run(grid(strengths, dampings, args.depth))
+        for err, k, c in results[:args.top]:
+            print(f'{args.metric} = {err:.6f}    k = {k}    c = {c}')
+        return
+
+    print('plotting simulation...')
+    replica_plot = simulation.plot(TimeBase(len(model_plot), SAMPLE_RATE))
+
+    print(f'writing model result to {MODEL_FILE_NAME}...')
+    save_plot(model_plot, MODEL_FILE_NAME)
+
+    print(f'writing simulation result to {SIMULATION_FILE_NAME}...')
+    save_plot(replica_plot, SIMULATION_FILE_NAME)
+
+    if timing.enabled: print('\n'.join(timing.summary()))
+
+    show(model_plot, replica_plot)
 
 
 
-### WAVE STUFF
-
-class Simulation:
-    ''' simulate the replica numerically '''
-    def __init__(self, model):
-        self.model = model
-
-    def integrate(self, ppx, px, a, dt):
-        ''' integrate x+1 give x and x-1, acceleration and delta time '''
-        return 2 * px - ppx + a * dt ** 2
-
-    def spring(self, pa, a, pb, b, t, k=SPRING_STRENGTH, c=SPRING_DAMPING):
-        ''' return the acceleration due to a spring between a and b on a '''
-        if callable(k): k = k(t)
-        if callable(c): c = c(t)
-        f = (b - a) * k # restoring force
-        va = a - pa # a velocity
-        vb = b - pb # b velocity
-        v = vb - va # b relative velocity
-        d = c * v # damping force
-        return f + d # ignoring mass differences
-
-    def plot(self, domain):
-        ''' run the simulation and plot the results '''
-
-        # fill the plot with the first two points in the model
-        # this is enough information to get started
-        # including initial position and velocity
-        plot = self.model[:2]
-
-        # run through the plot domain
-        for i in range(2, len(domain)):
-            t = domain[i]
-            dt = t - domain[i - 1]
-            ppx = plot[-2]
-            px = plot[-1]
-            ppm = self.model[i - 1]
-            pm = self.model[i]
-            a = self.spring(ppx, px, ppm, pm, t)
-            plot.append(self.integrate(ppx, px, a, dt))
-
-        # return the plot
-        return plot
-
-def flatten(t):
-    ''' flatten a tuple '''
-    return sum(t, tuple())
-
-def plot(func, domain):
-    ''' plot a function given a domain '''
-    return list(map(func, domain))
-
-def resample_plot(plot, size, offset, window_size):
-    ''' down or upscale a plot without interpolation '''
-    return list(map(lambda i: plot[int(offset + i / size * window_size) % len(plot)], range(size)))
-
-def sync(plot, offset):
-    ''' return the position of the first sample that croses the origin '''
-    last = None
-    check = None
-    while not last or last == check:
-        last = check
-        check = plot[offset % len(plot)] < 0
-        offset += 1
-    return offset
-
-def save_plot(plot, filename):
-    ''' write a plot to a .wav file '''
-    with wave.open(filename, 'w') as w:
-        w.setnchannels(1)
-        w.setsampwidth(1)
-        w.setframerate(SAMPLE_RATE)
-        for sample in plot:
-            w.writeframesraw(bytes([max(0, min(255, int(sample * 255)))]))
-
-def load_plot(filename):
-    ''' read a plot from a .wav file '''
-    def read_frame(frame):
-        ''' convert a frame into a plot sample '''
-        frame = w.readframes(1)
-        # get the samples for each channel
-        def get_sample(i):
-            width = w.getsampwidth()
-            start = i * width
-            end = start + width
-            sample = int.from_bytes(frame[start:end], byteorder='little', signed=True)
-            return sample / 2 ** (8 * width)
-        samples = list(map(get_sample, range(w.getnchannels())))
-        # and average them for mononess bro
-        sample = sum(samples) / len(samples)
-        return sample
-    with wave.open(filename, 'r') as w:
-        return list(map(read_frame, range(w.getnframes())))
-
-
-
-### PLOTTING
-
-import sys
-import wave
-
-# see if a wav file was specified for loading!
-if len(sys.argv) > 1:
-    fn = sys.argv[1]
-    print(f'loading model from {fn}...')
-    model_plot = load_plot(fn)
-else:
-    print('plottng model...')
-    model_func = lambda t: (1 - t * 110 % 1 * 2) * .4 # sawtooth waveform
-    model_plot = plot(model_func, DOMAIN)
-
-print('plotting simulation...')
-replica_plot = Simulation(model_plot).plot(DOMAIN)
-
-print(f'writing model result to {MODEL_FILE_NAME}...')
-save_plot(model_plot, MODEL_FILE_NAME)
-
-print(f'writing simulation result to {SIMULATION_FILE_NAME}...')
-save_plot(replica_plot, SIMULATION_FILE_NAME)
+### PYGLET STUFF
 
+def show(model_plot, replica_plot):
+    ''' display the model and replica on a live scope '''
+    import pyglet
+    import time
+    from waves.scope import Scope
+    from waves.display import draw_origin, draw_envelope
+    window = pyglet.window.Window(*SCREEN_SIZE)
 
+    # precompute the decimation pyramids up front so each frame is cheap
+    print('building scopes...')
+    model_scope = Scope(model_plot)
+    replica_scope = Scope(replica_plot)
 
-### PYGLET STUFF
+    @window.event
+    def on_draw():
+        ''' draw the screen '''
+
+        def draw_plot(scope, offset, window_size, color):
+            ''' draw the min/max envelope of a window of a plot to the screen '''
+            mins, maxs = scope.window(offset, window_size, SCREEN_SIZE[0])
+            draw_envelope(window, mins, maxs, color)
+
+        # clear the screen first
+        window.clear()
+
+        # draw the origin line
+        draw_origin(window, ORIGIN_COLOR)
+
+        # calculate the offset
+        t = time.time()
+        offset = int(t * SAMPLE_RATE)
+        window_size = DISPLAY_TIME_WINDOW * SAMPLE_RATE
+
+        # optionally syncronize the scope to the origin of the waveform
+        if SYNC_SCOPE: offset = model_scope.sync(offset)
+
+        # draw the model and replica plots
+        draw_plot(model_scope, offset, window_size, MODEL_COLOR)
+        draw_plot(replica_scope, offset, window_size, REPLICA_COLOR)
+
+    def update(dt):
+        pass
+
+    print('running...')
+    pyglet.clock.schedule_interval(update, 1 / FPS)
+    pyglet.app.run()
 
-import pyglet
-import time
-window = pyglet.window.Window(*SCREEN_SIZE)
-
-@window.event
-def on_draw():
-    ''' draw the screen '''
-
-    def vertex(i, plot):
-        ''' return a vertex for plotting a point from a plot on screen '''
-        h = SCREEN_SIZE[1] / 2
-        return i / len(plot) * SCREEN_SIZE[0], plot[i] * h + h
-
-    def draw_plot(plot, color):
-        ''' draw a plot to the screen '''
-        vertices = flatten(tuple(map(lambda i: vertex(i, plot), range(len(plot)))))
-        pyglet.graphics.draw(len(plot), pyglet.gl.GL_LINE_STRIP,
-            ('v2f', vertices),
-            ('c3B', color * len(plot)),
-            )
-
-    # clear the screen first
-    window.clear()
-
-    # draw the origin line
-    w, y = SCREEN_SIZE[0], SCREEN_SIZE[1] / 2
-    pyglet.graphics.draw(2, pyglet.gl.GL_LINE_STRIP,
-        ('v2f', (0, y, w, y)),
-        ('c3B', ORIGIN_COLOR * 2),
-        )
-
-    # calculate the offset
-    t = time.time()
-    offset = int(t * SAMPLE_RATE)
-    window_size = DISPLAY_TIME_WINDOW * SAMPLE_RATE
-
-    # optionally syncronize the scope to the origin of the waveform
-    if SYNC_SCOPE: offset = sync(model_plot, offset)
-
-    # draw the model plot
-    model_plot_render = resample_plot(model_plot, SCREEN_SIZE[1], offset, window_size)
-    draw_plot(model_plot_render, MODEL_COLOR)
-
-    # draw the replica plot
-    replica_plot_render = resample_plot(replica_plot, SCREEN_SIZE[1], offset, window_size)
-    draw_plot(replica_plot_render, REPLICA_COLOR)
-
-def update(dt):
-    pass
-
-print('running...')
-pyglet.clock.schedule_interval(update, 1 / FPS)
-pyglet.app.run()
+if __name__ == '__main__': main()
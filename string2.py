@@ -3,6 +3,7 @@
 # simulate a transverse wave on a string in 2d space
 # using spring forces
 # this will be a live numerical solution
+# this is the interactive front end, the string itself lives in waves.string2
 
 
 
@@ -12,117 +13,80 @@ SCREEN_SIZE = 500, 200
 STRING_RES = SCREEN_SIZE[0]
 FPS = 60
 SWEEPS = 20 # screen widths per second
+INTEGRATOR = 'verlet' # 'verlet', 'trapezoidal' or 'rk4'
+STEP_SIZE = 1 # time step of the string, bigger needs fewer SWEEPS but only the implicit 'trapezoidal' stays stable
 ORIGIN_COLOR = (63, 63, 63) # color of the line through the middle of the screen
 STRING_COLOR = (255, 0, 0) # color of the string
-SPRING_STRENGTH = .5
-SPRING_DAMPING = .05
-
-
-
-### STRING STUFF
-
-def flatten(t):
-    ''' flatten a tuple '''
-    return sum(t, tuple())
-
-class String:
-    ''' represents a string to simulate '''
-
-    def __init__(self, resolution, function):
-        # these are the displacement points
-        self.points = [0] * resolution
-
-        # and this is the previous state of them
-        self.points_p = list(self.points)
-
-        # the function to fixate to the end of the string
-        self.function = function
-
-    def draw(self, window, color=STRING_COLOR):
-        ''' draw the string onto a pyglet window '''
-        def vertex(i):
-            ''' make a vertex for a displacement point '''
-            h = SCREEN_SIZE[1] / 2
-            return i / len(self.points) * SCREEN_SIZE[0], self.points[i] * h + h
-        res = len(self.points)
-        vertices = list(map(vertex, range(res)))
-        pyglet.graphics.draw(res, pyglet.gl.GL_LINE_STRIP,
-            ('v2f', flatten(vertices)),
-            ('c3B', color * res),
-            )
-
-    def spring(self, a, pa, b, pb, k=SPRING_STRENGTH, c=SPRING_DAMPING):
-        ''' return the acceleration due to a spring between a and b on a '''
-        f = (b - a) * k * .5 # restoring force
-        va = a - pa # a velocity
-        vb = b - pb # b velocity
-        v = vb - va # b relative velocity
-        d = c * v # damping force
-        return f + d # ignoring mass differences
-
-    def update(self, t, dt):
-        ''' update the simulation '''
-
-        # backup the current state
-        current_state = list(self.points)
-
-        # update the rest of the displacement points
-        new_state = [self.function(t)]
-        for i, p, x in zip(range(len(self.points)), self.points_p, self.points):
-            v = x - p # velocity
-            a = 0 # acceleration
-            if i < len(self.points) - 1:
-                r = self.points[i + 1]
-                rp = self.points_p[i + 1]
-                a += self.spring(x, p, r, rp)
-            if i > 0:
-                l = self.points[i - 1]
-                lp = self.points_p[i - 1]
-                a += self.spring(x, p, l, lp)
-            if i > 0 and i < len(self.points) - 1:
-                new_state.append(x + v + a)# * dt ** 2)
-        new_state.append(0)
-
-        # set the new state
-        self.points = new_state
-        self.points_p = current_state
+PROFILE = False # time updates and drawing and show the timings on screen
 
 
 
-### PYGLET STUFF
+### IMPORTS
 
-import time
 import math
-import pyglet
-window = pyglet.window.Window(*SCREEN_SIZE)
+from waves import timing
+from waves.string2 import String
+from waves.scenario import load
 
-@window.event
-def on_draw():
-    ''' draw the screen '''
 
-    # clear the screen first
-    window.clear()
 
-    # draw the origin line
-    w, y = SCREEN_SIZE[0], SCREEN_SIZE[1] / 2
-    pyglet.graphics.draw(2, pyglet.gl.GL_LINE_STRIP,
-        ('v2f', (0, y, w, y)),
-        ('c3B', ORIGIN_COLOR * 2),
-        )
+### FRAMES
 
-    # draw the string
-    simulation.draw(window)
+def setup(scenario=None):
+    ''' return the string to animate, set up from a scenario if given '''
+    if scenario: return scenario.build()
+    #wave_func = lambda t: math.sin(t * 2 * math.pi) * 0.5
+    #wave_func = lambda t: 0.5 if t > 1 and t < 1.5 else 0
+    wave_func = lambda t: ((t % 1) * 2 - 1) * 0.25
+    return String(STRING_RES, wave_func, INTEGRATOR, STEP_SIZE)
 
-def update(dt):
+def update(simulation, t, dt):
+    ''' step the string through one frame, t being the time since the start '''
     for i in range(SWEEPS):
-        simulation.update(time.time() - start_time, dt / SWEEPS)
+        simulation.update(t, dt / SWEEPS)
+
+def draw(target, simulation, t, painter):
+    ''' draw the string onto a pyglet window (painter=waves.display) or a canvas (painter=waves.raster) '''
+    painter.draw_origin(target, ORIGIN_COLOR)
+    with timing.stage('string2.draw'):
+        painter.draw_plot(target, simulation.points, STRING_COLOR)
+
+
+
+### PYGLET STUFF
+
+def main():
+    ''' simulate a string in a pyglet window '''
+    import argparse
+    parser = argparse.ArgumentParser(description='simulate a string of springs')
+    parser.add_argument('--scenario', help='a json scenario file to set up from instead of the built in setup')
+    args = parser.parse_args()
+    scenario = load(args.scenario) if args.scenario else None
+    import time
+    import pyglet
+    from waves import display
+    window = pyglet.window.Window(*SCREEN_SIZE)
+
+    # optionally time every stage of the loop
+    if PROFILE: timing.enable()
+    if timing.enabled:
+        timing_display = display.TimingOverlay(window)
+
+    @window.event
+    def on_draw():
+        ''' draw the screen '''
+
+        # clear the screen first
+        window.clear()
+
+        draw(window, simulation, time.time() - start_time, display)
+
+        if timing.enabled: timing_display.draw()
 
-start_time = time.time()
+    start_time = time.time()
+    simulation = setup(scenario)
 
-#wave_func = lambda t: math.sin(t * 2 * math.pi) * 0.5
-#wave_func = lambda t: 0.5 if t > 1 and t < 1.5 else 0
-wave_func = lambda t: ((t % 1) * 2 - 1) * 0.25
-simulation = String(STRING_RES, wave_func)
+    pyglet.clock.schedule_interval(lambda dt: update(simulation, time.time() - start_time, dt), 1 / FPS)
+    pyglet.app.run()
 
-pyglet.clock.schedule_interval(update, 1 / FPS)
-pyglet.app.run()
+if __name__ == '__main__': main()
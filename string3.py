@@ -3,6 +3,7 @@
 # simulate a transverse wave on a string in 2d space
 # this will be a simple progression of energy left and right
 # this will be a live numerical solution
+# this is the interactive front end, the string itself lives in waves.string3
 
 
 
@@ -14,109 +15,83 @@ FPS = 60
 SWEEPS = 1
 WAVE_VELOCITY = FPS * SWEEPS / SCREEN_SIZE[0]
 ORIGIN_COLOR = (63, 63, 63) # color of the line through the middle of the screen
-STRING_COLOR = (255, 0, 0) # color of the string
 COLORS = ((255, 0, 0), (0, 255, 0), (0, 0, 255))
-REFLECTION = .5
+PROFILE = False # time updates and drawing and show the timings on screen
 
 
 
-### STRING STUFF
+### IMPORTS
 
-def flatten(t):
-    ''' flatten a tuple '''
-    return sum(t, tuple())
+import math
+import types
+from waves import timing
+from waves.string3 import String
+from waves.scenario import load
+
+
+
+### FRAMES
+
+def setup(scenario=None):
+    ''' return the strings to animate along with their own clock, set up from a scenario if given '''
+    if scenario: return types.SimpleNamespace(simulations=scenario.build(), time=0)
+    simulations = list()
+    wave_func = lambda t: ((t * WAVE_VELOCITY % 1) * 2 - 1) * 0.5
+    simulations.append(String(STRING_RES, wave_func))
+    wave_func = lambda t: math.sin(t * WAVE_VELOCITY * 2 * math.pi) * 0.5
+    simulations.append(String(STRING_RES, wave_func))
+    wave_func = lambda t: 0.5 if t > 1 and t < 1.5 else 0
+    simulations.append(String(STRING_RES, wave_func))
+    return types.SimpleNamespace(simulations=simulations, time=0)
+
+def update(state, t, dt):
+    ''' step the strings through one frame, they keep their own clock so t and dt are ignored '''
+    for simulation in state.simulations:
+        for i in range(SWEEPS):
+            simulation.update(state.time)
+            state.time += 1 / FPS / SWEEPS
 
-class String:
-    ''' represents a string to simulate '''
+def draw(target, state, t, painter):
+    ''' draw the strings onto a pyglet window (painter=waves.display) or a canvas (painter=waves.raster) '''
+    painter.draw_origin(target, ORIGIN_COLOR)
+    with timing.stage('string3.draw'):
+        for i, simulation in enumerate(state.simulations):
+            color = COLORS[i % len(COLORS)]
+            painter.draw_plot(target, simulation.points, color)
 
-    def __init__(self, resolution, function):
-        # keep track of energy moving left and right both
-        self.left = [0] * resolution
-        self.right = [0] * resolution
 
-        # the function to fixate to the end of the string
-        self.function = function
 
-    def __len__(self):
-        ''' return the resolution of this string '''
-        return len(self.left)
+### PYGLET STUFF
 
-    def __getitem__(self, i):
-        ''' return the sum energy at a point on this string '''
-        return self.left[i] + self.right[i]
+def main():
+    ''' simulate some strings in a pyglet window '''
+    import argparse
+    parser = argparse.ArgumentParser(description='simulate strings as energy moving left and right')
+    parser.add_argument('--scenario', help='a json scenario file to set up from instead of the built in setup')
+    args = parser.parse_args()
+    scenario = load(args.scenario) if args.scenario else None
+    import pyglet
+    from waves import display
+    window = pyglet.window.Window(*SCREEN_SIZE)
 
-    def draw(self, window, color=STRING_COLOR):
-        ''' draw the string onto a pyglet window '''
-        def vertex(i):
-            ''' make a vertex for a displacement point '''
-            h = SCREEN_SIZE[1] / 2
-            return i / len(self) * SCREEN_SIZE[0], self[i] * h + h
-        res = len(self)
-        vertices = list(map(vertex, range(res)))
-        pyglet.graphics.draw(res, pyglet.gl.GL_LINE_STRIP,
-            ('v2f', flatten(vertices)),
-            ('c3B', color * res),
-            )
+    # optionally time every stage of the loop
+    if PROFILE: timing.enable()
+    if timing.enabled:
+        timing_display = display.TimingOverlay(window)
 
-    def update(self, t):
-        ''' update the simulation '''
-        
-        # generate the sound source
-        source = self.function(t)
+    @window.event
+    def on_draw():
+        ''' draw the screen '''
 
-        # go round robin
-        carry_right = self.right[-1]
-        carry_left = self.left[0] + source
-        for x in reversed(range(1, len(self))):
-            self.right[x] = self.right[x - 1]
-        self.right[0] = carry_left * REFLECTION
-        for x in range(0, len(self) - 1):
-            self.left[x] = self.left[x + 1]
-        self.left[len(self) - 1] = carry_right * REFLECTION
+        # clear the screen first
+        window.clear()
 
+        draw(window, state, state.time, display)
 
+        if timing.enabled: timing_display.draw()
 
-### PYGLET STUFF
+    state = setup(scenario)
+    pyglet.clock.schedule_interval(lambda dt: update(state, state.time, dt), 1 / FPS)
+    pyglet.app.run()
 
-import math
-import pyglet
-window = pyglet.window.Window(*SCREEN_SIZE)
-
-@window.event
-def on_draw():
-    ''' draw the screen '''
-
-    # clear the screen first
-    window.clear()
-
-    # draw the origin line
-    w, y = SCREEN_SIZE[0], SCREEN_SIZE[1] / 2
-    pyglet.graphics.draw(2, pyglet.gl.GL_LINE_STRIP,
-        ('v2f', (0, y, w, y)),
-        ('c3B', ORIGIN_COLOR * 2),
-        )
-
-    # draw the string
-    i = 0
-    for simulation in simulations:
-        simulation.draw(window, COLORS[i])
-        i += 1
-
-def update(dt):
-    global time
-    for simulation in simulations:
-        for i in range(SWEEPS):
-            simulation.update(time)
-            time += 1 / FPS / SWEEPS
-
-time = 0
-simulations = list()
-wave_func = lambda t: ((t * WAVE_VELOCITY % 1) * 2 - 1) * 0.5
-simulations.append(String(STRING_RES, wave_func))
-wave_func = lambda t: math.sin(t * WAVE_VELOCITY * 2 * math.pi) * 0.5
-simulations.append(String(STRING_RES, wave_func))
-wave_func = lambda t: 0.5 if t > 1 and t < 1.5 else 0
-simulations.append(String(STRING_RES, wave_func))
-
-pyglet.clock.schedule_interval(update, 1 / FPS)
-pyglet.app.run()
+if __name__ == '__main__': main()
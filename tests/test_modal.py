@@ -0,0 +1,50 @@
+# check that jumping the strings with waves.modal lands where stepping them one update at a time does
+
+
+
+### IMPORTS
+
+import numpy as np
+import pytest
+from waves import modal
+from waves import string2
+from waves import string3
+
+
+
+### TESTS
+
+def drive(t):
+    ''' a driven end that moves for a bit and then holds still '''
+    return .3 if t >= 10 else .03 * t
+
+@pytest.mark.parametrize('k, c, step_size', [(.5, .05, 1), (1.5, .1, 1), (.3, .02, 2)])
+def test_spring_modes(k, c, step_size):
+    stepped = string2.String(60, drive, 'verlet', step_size, k, c)
+    jumped = string2.String(60, drive, 'verlet', step_size, k, c)
+    for t in range(10):
+        stepped.update(t, 1)
+        jumped.update(t, 1)
+
+    for i in range(100):
+        stepped.update(10, 1)
+    modal.SpringModes(60).fast_forward(jumped, 100, 10)
+
+    assert np.allclose(jumped.points, stepped.points, atol=1e-10)
+    assert np.allclose(jumped.points_p, stepped.points_p, atol=1e-10)
+    assert np.allclose(jumped.velocities, stepped.velocities, atol=1e-10)
+
+@pytest.mark.parametrize('reflection', [.5, .3])
+def test_ring_modes(reflection):
+    stepped = string3.String(40, drive, reflection)
+    jumped = string3.String(40, drive, reflection)
+    for t in range(10):
+        stepped.update(t)
+        jumped.update(t)
+
+    for i in range(97):
+        stepped.update(10)
+    modal.RingModes(40).fast_forward(jumped, 97, 10)
+
+    assert np.allclose(jumped.left, stepped.left, atol=1e-12)
+    assert np.allclose(jumped.right, stepped.right, atol=1e-12)
@@ -0,0 +1,31 @@
+# check the polyphase resampler against tones worked out exactly at the new rate
+
+
+
+### IMPORTS
+
+import numpy as np
+import pytest
+from waves.resample import Resampler, resample
+
+
+
+### TESTS
+
+def tone(freq, rate, count):
+    return np.sin(2 * np.pi * freq * np.arange(count) / rate)
+
+@pytest.mark.parametrize('rate_in, rate_out', [(44100, 48000), (48000, 44100), (44100, 22050), (22050, 44100)])
+def test_tone(rate_in, rate_out):
+    plot = tone(1000, rate_in, 8820)
+    resampled = resample(plot, rate_in, rate_out)
+    assert len(resampled) == Resampler(rate_in, rate_out).length(len(plot))
+
+    # away from the ends, where the filter runs off the plot, it should be the tone sampled at the new rate
+    expected = tone(1000, rate_out, len(resampled))
+    assert np.abs(resampled - expected)[200:-200].max() < 1e-4
+
+def test_out_of_band():
+    # 15 kHz is above the nyquist frequency of 22050 Hz, so it should be filtered out rather than alias down
+    resampled = resample(tone(15000, 44100, 8820), 44100, 22050)
+    assert np.abs(resampled[200:-200]).max() < 1e-3
@@ -0,0 +1,63 @@
+# check the scope's pyramid lookups against working the same things out sample by sample
+
+
+
+### IMPORTS
+
+import numpy as np
+import pytest
+from waves.scope import Scope
+
+
+
+### REFERENCES
+
+def window(plot, offset, size, columns):
+    ''' return the min and max of every column of a window, looping the plot, one column at a time '''
+    n = len(plot)
+    samples_per_column = size / columns
+    mins, maxs = list(), list()
+    for column in range(columns):
+        first = int(offset) + int(column * samples_per_column)
+        last = max(int(offset) + int((column + 1) * samples_per_column), first + 1)
+        samples = plot[np.arange(first, min(last, first + n)) % n]
+        mins.append(samples.min())
+        maxs.append(samples.max())
+    return np.array(mins), np.array(maxs)
+
+def sync(plot, offset):
+    ''' the original sample by sample search for the first sample that crosses the origin '''
+    last = None
+    check = None
+    while not last or last == check:
+        last = check
+        check = plot[offset % len(plot)] < 0
+        offset += 1
+    return offset
+
+
+
+### TESTS
+
+@pytest.fixture(params=[44101, 2205, 7])
+def plot(request):
+    rng = np.random.default_rng(request.param)
+    # a few noisy cycles, so there are always zero crossings to find
+    return np.sin(np.arange(request.param) * 2 * np.pi * 3 / request.param) + rng.normal(0, .3, request.param)
+
+@pytest.mark.parametrize('size, columns', [(2205, 800), (2205, 2400), (50, 800)])
+def test_window(plot, size, columns):
+    scope = Scope(plot)
+    n = len(plot)
+    # including offsets whose windows run past the end of the plot and offsets many loops in
+    for offset in (0, 5, n - 3, n - size // 2, 3 * n + 11, 1_700_000_123.7):
+        mins, maxs = scope.window(offset, size, columns)
+        expected_mins, expected_maxs = window(plot, offset, size, columns)
+        assert np.array_equal(mins, expected_mins)
+        assert np.array_equal(maxs, expected_maxs)
+
+def test_sync(plot):
+    scope = Scope(plot)
+    n = len(plot)
+    for offset in (0, 1, n // 2, n - 2, n - 1, n, 5 * n - 1, 1_700_000_123):
+        assert scope.sync(offset) == sync(plot, offset)
@@ -0,0 +1,16 @@
+# a collection of wave simulations
+#
+# the solvers are importable without pyglet or any other display dependency,
+# the pyglet drawing helpers live in waves.display and only the front end scripts import it
+#
+# submodules are loaded lazily on first attribute access so `import waves` stays cheap
+
+import importlib
+
+__all__ = ['fluid', 'refine', 'pipeline', 'raster', 'record', 'string1', 'string2', 'string3', 'modal', 'spring', 'resample', 'sweep', 'scope', 'timing', 'scenario', 'cache', 'waveform']
+
+def __getattr__(name):
+    ''' import a submodule the first time it is asked for '''
+    if name in __all__:
+        return importlib.import_module(f'.{name}', __name__)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
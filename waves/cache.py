@@ -0,0 +1,146 @@
+# an on disk cache for things that take a while to set up, like initial lattices and rendered model waves
+#
+# entries are .npz files named after a hash of the json spec they were made from, so the same spec always
+# finds the same entry and a changed spec never finds a stale one
+# reading an entry touches it, and once the cache grows past its size limit the least recently used entries go
+
+
+
+### CONFIG
+
+import os
+
+DIRECTORY = os.environ.get('WAVES_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'waves')) # 'off' disables caching
+LIMIT = 256 * 1024 ** 2 # most bytes to keep on disk
+VERSION = 1 # bump to invalidate every entry made by older code
+
+
+
+### IMPORTS
+
+import json
+import hashlib
+import tempfile
+import numpy as np
+
+
+
+### CACHE STUFF
+
+def key(kind, spec):
+    ''' return the content address of a spec, a hash of its canonical json '''
+    text = json.dumps({'kind': kind, 'spec': spec, 'version': VERSION}, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+class Cache:
+    ''' a directory of arrays addressed by the specs they were computed from '''
+
+    def __init__(self, directory=DIRECTORY, limit=LIMIT):
+        self.directory = directory
+        self.limit = limit
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.directory not in ('', 'off')
+
+    def path(self, kind, spec):
+        ''' return the file an entry lives in '''
+        return os.path.join(self.directory, f'{kind}-{key(kind, spec)}.npz')
+
+    def get(self, kind, spec):
+        ''' return the dict of arrays stored for a spec, or None if there isn't one '''
+        if not self.enabled:
+            return None
+        path = self.path(kind, spec)
+        try:
+            with np.load(path) as entry:
+                arrays = {name: entry[name] for name in entry.files}
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        try:
+            os.utime(path) # mark it recently used
+        except OSError:
+            pass # evicted by someone else since, but it was read fine
+        self.hits += 1
+        return arrays
+
+    def put(self, kind, spec, arrays):
+        ''' store a dict of arrays for a spec, then make room if the cache got too big
+
+        the cache is only there to save time, so if it can't be written to the entry just isn't kept
+        '''
+        if not self.enabled:
+            return
+        temporary = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # write to a temporary file first so other processes never see half an entry,
+            # named so that entries() doesn't count it and evict() can't delete it from under us
+            handle, temporary = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+            with os.fdopen(handle, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(temporary, self.path(kind, spec))
+            temporary = None
+            self.evict()
+        except OSError:
+            pass
+        finally:
+            if temporary is not None:
+                try:
+                    os.remove(temporary)
+                except OSError:
+                    pass
+
+    def fetch(self, kind, spec, compute):
+        ''' return the arrays for a spec, calling compute() for a dict of them and storing it if they aren't cached '''
+        arrays = self.get(kind, spec)
+        if arrays is None:
+            arrays = compute()
+            self.put(kind, spec, arrays)
+        return arrays
+
+    def entries(self):
+        ''' return (mtime, size, path) for every entry, least recently used first '''
+        entries = list()
+        if not os.path.isdir(self.directory):
+            return entries
+        for name in os.listdir(self.directory):
+            if name.endswith('.npz'):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue # someone else evicted it
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def evict(self):
+        ''' delete least recently used entries until the cache fits in its limit '''
+        entries = self.entries()
+        total = sum(size for mtime, size, path in entries)
+        for mtime, size, path in entries:
+            if total <= self.limit:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        ''' delete every entry '''
+        for mtime, size, path in self.entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+# the cache everything shares unless told otherwise
+default = Cache()
+
+def fetch(kind, spec, compute):
+    ''' return cached arrays for a spec from the default cache, computing them if needed '''
+    return default.fetch(kind, spec, compute)
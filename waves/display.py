@@ -0,0 +1,65 @@
+# pyglet drawing helpers shared by the front ends
+# importing this imports pyglet, so only the front ends should ever do it
+
+
+
+### IMPORTS
+
+import pyglet
+import numpy as np
+
+
+
+### DRAWING STUFF
+
+def flatten(t):
+    ''' flatten a tuple '''
+    return sum(t, tuple())
+
+def draw_origin(window, color):
+    ''' draw the line through the middle of the screen '''
+    w, y = window.width, window.height / 2
+    pyglet.graphics.draw(2, pyglet.gl.GL_LINE_STRIP,
+        ('v2f', (0, y, w, y)),
+        ('c3B', color * 2),
+        )
+
+def draw_plot(window, values, color, x_scale=None):
+    ''' draw a sequence of displacements across the screen as a line
+
+    x_scale is the horizontal distance between points, by default the values fill the screen
+    '''
+    if x_scale is None: x_scale = window.width / len(values)
+    h = window.height / 2
+    vertices = tuple(map(lambda i: (i * x_scale, values[i] * h + h), range(len(values))))
+    pyglet.graphics.draw(len(values), pyglet.gl.GL_LINE_STRIP,
+        ('v2f', flatten(vertices)),
+        ('c3B', color * len(values)),
+        )
+
+def draw_envelope(window, mins, maxs, color):
+    ''' draw a min/max envelope with one column per screen pixel '''
+    columns = len(mins)
+    h = window.height / 2
+    vertices = np.empty((columns, 2, 2))
+    vertices[:, :, 0] = (np.arange(columns) * window.width / columns)[:, None]
+    vertices[:, 0, 1] = np.asarray(mins) * h + h
+    vertices[:, 1, 1] = np.asarray(maxs) * h + h
+    pyglet.graphics.draw(columns * 2, pyglet.gl.GL_LINE_STRIP,
+        ('v2f', tuple(vertices.ravel())),
+        ('c3B', color * columns * 2),
+        )
+
+class TimingOverlay:
+    ''' draws the per stage timings from waves.timing in the corner of a window '''
+
+    def __init__(self, window, color=(255, 255, 0, 127)):
+        self.window = window
+        self.label = pyglet.text.Label('', font_name='Mono', font_size=8, bold=True, color=color,
+                x=4, y=window.height - 4, anchor_y='top', multiline=True, width=window.width - 8)
+
+    def draw(self):
+        ''' draw the latest timings '''
+        from . import timing
+        self.label.text = '\n'.join(timing.summary())
+        self.label.draw()
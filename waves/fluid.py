@@ -0,0 +1,312 @@
+# 2d fluid simulation using lattice boltzmann algorithm
+# the populations of every node live in one (9, width, height) numpy array,
+# so collision, streaming and forcing work on the whole lattice at once
+
+
+
+### CONFIG
+
+DIMENSIONS = 50, 50 # dimensions of the simulation lattice
+VISCOSITY = 0.02
+
+
+
+### CONSTANTS
+
+OMEGA = 1 / (3 * VISCOSITY + .5) # reciprocal relaxation time
+
+# the discrete directions, in the same order as Node.densities
+DIRECTIONS = 'c', 'n', 's', 'e', 'w', 'nw', 'ne', 'sw', 'se'
+
+
+
+### IMPORTS
+
+import numpy as np
+from . import timing
+
+
+
+### TABLES
+
+# the velocity (ux, uy) of each direction and its weight in the equilibrium distribution
+VELOCITIES = np.array(((0, 0), (0, 1), (0, -1), (1, 0), (-1, 0), (-1, 1), (1, 1), (-1, -1), (1, -1)))
+WEIGHTS = np.array((4 / 9,) + (1 / 9,) * 4 + (1 / 36,) * 4)
+
+# how far each direction moves in (column, row) per step, rows run south while uy points north
+SHIFTS = tuple((int(ex), int(-ey)) for ex, ey in VELOCITIES)
+
+# the same tables shaped to broadcast against a (9, width, height) lattice
+EX = VELOCITIES[:, 0].reshape(-1, 1, 1).astype(float)
+EY = VELOCITIES[:, 1].reshape(-1, 1, 1).astype(float)
+W = WEIGHTS.reshape(-1, 1, 1)
+
+
+
+### FUNCTIONS
+
+def equilibrium(rho, ux, uy):
+    ''' return the equilibrium populations for arrays of densities and velocities, stacked along a new first axis '''
+    # TODO: actually understand this stuff lol
+    # rn its just taken from https://physics.weber.edu/schroeder/fluids/
+    rho, ux, uy = np.asarray(rho, dtype=float), np.asarray(ux, dtype=float), np.asarray(uy, dtype=float)
+    shape = (len(DIRECTIONS),) + (1,) * rho.ndim
+    eu = 3 * (VELOCITIES[:, 0].reshape(shape) * ux + VELOCITIES[:, 1].reshape(shape) * uy)
+    return WEIGHTS.reshape(shape) * rho * (1 + eu + 0.5 * eu ** 2 - 1.5 * (ux ** 2 + uy ** 2))
+
+def macroscopic(populations):
+    ''' return the density and velocity arrays of a stack of populations '''
+    rho = populations.sum(0)
+    ux = np.tensordot(VELOCITIES[:, 0], populations, 1) / rho
+    uy = np.tensordot(VELOCITIES[:, 1], populations, 1) / rho
+    return rho, ux, uy
+
+def relaxation(omega, ratio):
+    ''' return the relaxation rate that keeps the viscosity the same on a lattice ratio times finer
+
+    with the lattice spacing and time step both shrunk by ratio, tau - 1/2 has to grow by ratio
+    '''
+    return 1 / (ratio * (1 / omega - .5) + .5)
+
+def forcing(ux, uy, fx, fy, omega):
+    ''' return the guo forcing term that adds a body force to a lattice during collision '''
+    eu = EX * ux + EY * uy
+    ef = EX * fx + EY * fy
+    return (1 - omega / 2) * W * (3 * (ef - (ux * fx + uy * fy)) + 9 * eu * ef)
+
+
+
+### CLASSES
+
+class Node:
+    ''' represents a lattice node
+
+    a node is a view onto the populations of one site of a lattice,
+    or owns its own populations when it is created on its own
+    '''
+
+    def __init__(self, rho=1, ux=0, uy=0, populations=None):
+        if populations is None:
+            self.populations = np.empty(len(DIRECTIONS))
+            self.set_equilibrium(ux, uy, rho)
+        else:
+            self.populations = populations
+
+    @property
+    def densities(self):
+        ''' return a sequence of the discretized densities '''
+        return tuple(self.populations)
+
+    @densities.setter
+    def densities(self, value):
+        ''' set the discretized densities, in the same order they are returned '''
+        self.populations[:] = value
+
+    @property
+    def ux(self):
+        ''' return the x component of this node's velocity '''
+        return float(VELOCITIES[:, 0] @ self.populations) / self.rho
+
+    @property
+    def uy(self):
+        ''' return the y component of this node's velocity '''
+        return float(VELOCITIES[:, 1] @ self.populations) / self.rho
+
+    @property
+    def u(self):
+        ''' return this node's velocity '''
+        return self.ux, self.uy
+
+    @u.setter
+    def u(self, value):
+        ''' set the macroscopic velocity of this node '''
+        ux, uy = value
+        self.set_equilibrium(ux, uy, self.rho)
+
+    @property
+    def rho(self):
+        ''' return the macroscopic density of this node '''
+        return float(self.populations.sum())
+
+    @rho.setter
+    def rho(self, value):
+        ''' set the macroscopic density of this node '''
+        self.set_equilibrium(self.ux, self.uy, value)
+
+    def set_equilibrium(self, ux, uy, rho):
+        ''' set the macroscopic velocity and density according to the equilibrium distribution '''
+        self.populations[:] = equilibrium(rho, ux, uy)
+
+    def collide(self, omega=OMEGA):
+        ''' update the distribution of mass in this node '''
+        self.populations += omega * (equilibrium(self.rho, self.ux, self.uy) - self.populations)
+
+# give nodes an attribute for each direction too, like node.ne
+for i, direction in enumerate(DIRECTIONS):
+    def get(self, i=i):
+        return self.populations[i]
+    def set(self, value, i=i):
+        self.populations[i] = value
+    setattr(Node, direction, property(get, set, doc=f''' the population moving {direction} '''))
+del i, direction, get, set
+
+class Lattice:
+    ''' represents a lattice of nodes, as views onto a (9, width, height) array of populations '''
+
+    def __init__(self, populations):
+        self.populations = populations
+
+    def __len__(self):
+        ''' return the number of nodes in this lattice '''
+        return int(np.prod(self.dimensions))
+
+    def __getitem__(self, coords):
+        ''' return the node in the lattice given its coordiates, wrapping around the edges '''
+        coords = tuple(c % d for c, d in zip(coords, self.dimensions))
+        return Node(populations=self.populations[(slice(None),) + coords])
+
+    def __iter__(self):
+        ''' return an iterator to iterate linearly through all nodes '''
+        return map(self.__getitem__, np.ndindex(self.dimensions))
+
+    @property
+    def dimensions(self):
+        ''' return the dimensions of this lattice '''
+        return self.populations.shape[1:]
+
+    @property
+    def dimensionality(self):
+        ''' return the dimensionality of this lattice (2d, 3d, 4d, etc) '''
+        return len(self.dimensions)
+
+    def sum(self, func):
+        ''' return the sum of applying a function to each node '''
+        return sum(np.array(list(map(func, self))))
+
+    def average(self, func):
+        ''' return the average of applying a function to each node '''
+        return self.sum(func) / len(self)
+
+class Simulation:
+    ''' represents a fluid simulation state '''
+
+    def __init__(self, dimensions=DIMENSIONS, omega=OMEGA):
+        self.omega = omega
+        self.dimensions = tuple(dimensions)
+
+        # "double buffering"
+        self.populations = equilibrium(np.ones(self.dimensions), 0, 0)
+        self.buffer = np.empty_like(self.populations)
+
+        # body force impulses waiting to be applied during the next step
+        self.impulses = list()
+
+        # what the timing stages of this lattice are called, so the refined lattices can be told apart
+        self.name = 'fluid'
+
+    @property
+    def lattice(self):
+        ''' return the current lattice, for getting at individual nodes '''
+        return Lattice(self.populations)
+
+    def force(self, position, force):
+        ''' queue up a body force (fx, fy) at a lattice position to be applied once during the next step
+
+        any number of impulses can be queued during a frame, they all go into one vectorized forcing term
+        '''
+        self.impulses.append((position, force))
+
+    def gather_forces(self):
+        ''' return the force field built from the queued impulses and forget them, or None if there are none '''
+        if not self.impulses:
+            return None
+        impulses, self.impulses = self.impulses, list()
+        positions = np.array([position for position, force in impulses]) % self.dimensions
+        forces = np.array([force for position, force in impulses], dtype=float)
+        field = np.zeros((2,) + self.dimensions)
+        np.add.at(field[0], (positions[:, 0], positions[:, 1]), forces[:, 0])
+        np.add.at(field[1], (positions[:, 0], positions[:, 1]), forces[:, 1])
+        return field
+
+    def step(self, forces=None):
+        ''' perform a single step of the simulation, with an optional (2, width, height) body force field on top of the queued impulses '''
+        impulses = self.gather_forces()
+        if impulses is not None:
+            forces = impulses if forces is None else forces + impulses
+        with timing.stage(self.name + '.collide'):
+            self.collide(forces)
+        with timing.stage(self.name + '.stream'):
+            self.stream()
+
+    def null_edges(self, rho=1):
+        ''' force the nodes along the edges of the lattice to rest at the given density '''
+        with timing.stage(self.name + '.boundary'):
+            rest = equilibrium(rho, 0, 0)[:, None, None]
+            self.populations[:, (0, -1), :] = rest
+            self.populations[:, :, (0, -1)] = rest
+
+    def collide(self, forces=None):
+        ''' perform the inner-node collisions, with an optional (2, width, height) body force field '''
+        f = self.populations
+        rho = f.sum(0)
+        ux = (EX * f).sum(0)
+        uy = (EY * f).sum(0)
+
+        # with a force the velocity is taken half way through the step
+        if forces is not None:
+            ux += forces[0] / 2
+            uy += forces[1] / 2
+        ux /= rho
+        uy /= rho
+
+        f += self.omega * (equilibrium(rho, ux, uy) - f)
+        if forces is not None:
+            f += forcing(ux, uy, forces[0], forces[1], self.omega)
+
+    def stream(self):
+        ''' move the mass between nodes according to their velocities '''
+        for i, shift in enumerate(SHIFTS):
+            self.buffer[i] = np.roll(self.populations[i], shift, (0, 1))
+
+        # swap the 'buffers'
+        self.populations, self.buffer = self.buffer, self.populations
+
+    def get_populations(self, xs, ys):
+        ''' return the populations of the nodes in the given columns and rows as a (9, len(xs), len(ys)) array '''
+        xs = np.asarray(xs)[:, None] % self.dimensions[0]
+        ys = np.asarray(ys)[None, :] % self.dimensions[1]
+        return self.populations[:, xs, ys]
+
+    def set_populations(self, xs, ys, populations):
+        ''' set the populations of the nodes in the given columns and rows from a (9, len(xs), len(ys)) array '''
+        xs = np.asarray(xs)[:, None] % self.dimensions[0]
+        ys = np.asarray(ys)[None, :] % self.dimensions[1]
+        self.populations[:, xs, ys] = populations
+
+    @property
+    def mass(self):
+        ''' return the total mass in the system '''
+        return self.populations.sum()
+
+    @property
+    def velocity(self):
+        ''' return the average velocity of the system '''
+        rho, ux, uy = macroscopic(self.populations)
+        return np.array((ux.mean(), uy.mean()))
+
+    def render(self, out=None):
+        ''' render the density of the simulation into a (width, height, 4) rgba array, allocating one if needed '''
+        # TODO: better, more general visualization
+        if out is None:
+            out = np.empty(self.dimensions + (4,), dtype=np.uint8)
+        value = np.clip(np.trunc(self.populations.sum(0) * 600) - 500, 0, 255)
+        out[..., 0] = value
+        out[..., 1] = np.minimum(255, value ** 2 // 500)
+        out[..., 2] = 0
+        out[..., 3] = 255
+        return out
+
+    def draw(self, buffer_size):
+        ''' render the state of the simulation, returning raw image bytes data '''
+        with timing.stage('fluid.draw'):
+            return self.render().tobytes().ljust(buffer_size, b'\0')
@@ -0,0 +1,165 @@
+# modal solutions for the numerical strings in waves.string2 and waves.string3
+#
+# both strings are linear, so while their driven end is held still they can be jumped straight to any later step:
+# the spring string splits into independent sine modes (a fast sine transform does the splitting)
+# and the round robin string is just a ring that every step rotates by one place
+#
+# a jump costs about the same however many steps it covers, which makes these good for fast forwarding
+# through quiet stretches and as an exact reference to check the stepped strings against
+
+
+
+### IMPORTS
+
+import numpy as np
+from . import timing
+from . import string2
+from . import string3
+
+
+
+### TRANSFORMS
+
+def dst(x):
+    ''' return the type 1 discrete sine transform of x, y[k] = sum(x[i] * sin(pi * (k + 1) * (i + 1) / (n + 1))) '''
+    n = len(x)
+    odd = np.zeros(2 * (n + 1))
+    odd[1:n + 1] = x
+    odd[n + 2:] = -x[::-1]
+    return -np.fft.rfft(odd)[1:n + 1].imag / 2
+
+def idst(y):
+    ''' return the inverse of dst '''
+    return dst(y) * 2 / (len(y) + 1)
+
+
+
+### SPRING STRING
+
+class SpringModes:
+    ''' jumps the state of a waves.string2.String through any number of steps with its driven end held still
+
+    the interior points obey x' = x + v + k/2 lap(x) + c lap(v), with lap the discrete second difference,
+    which the sine transform splits into one two term recurrence per mode
+    '''
+
+    def __init__(self, resolution, k=string2.SPRING_STRENGTH, c=string2.SPRING_DAMPING):
+        self.resolution = resolution
+        self.k = k
+        self.c = c
+
+        # eigenvalues of the second difference with both ends pinned
+        n = resolution - 2
+        lam = -4 * np.sin(np.pi * np.arange(1, n + 1) / (2 * (n + 1))) ** 2
+
+        # each mode steps as (q', q) = [[a, -b], [1, 0]] (q, q_previous)
+        self.matrices = np.zeros((n, 2, 2))
+        self.matrices[:, 0, 0] = 2 + (k / 2 + c) * lam
+        self.matrices[:, 0, 1] = -(1 + c * lam)
+        self.matrices[:, 1, 0] = 1
+
+    def step(self, points, points_p, boundary):
+        ''' return the next (points, points_p) as arrays after one ordinary step with the driven end at boundary '''
+        x = np.asarray(points, dtype=float)
+        p = np.asarray(points_p, dtype=float)
+        v = x - p
+        new = np.empty_like(x)
+        new[0] = boundary
+        new[1:-1] = x[1:-1] + v[1:-1] + self.k / 2 * (x[:-2] - 2 * x[1:-1] + x[2:]) + self.c * (v[:-2] - 2 * v[1:-1] + v[2:])
+        new[-1] = 0
+        return new, x
+
+    def static(self, boundary):
+        ''' return the resting shape of the string with the driven end held at boundary, a straight line to the fixed end '''
+        return boundary * np.linspace(1, 0, self.resolution)
+
+    def advance(self, points, points_p, steps, boundary):
+        ''' return (points, points_p) as arrays after steps updates with the driven end held at boundary '''
+        with timing.stage('modal.spring'):
+            x = np.asarray(points, dtype=float)
+            p = np.asarray(points_p, dtype=float)
+
+            # the modes only separate once the driven end has been at boundary for the last two steps too
+            while steps > 0 and (x[0] != boundary or p[0] != boundary):
+                x, p = self.step(x, p, boundary)
+                steps -= 1
+            if steps == 0:
+                return x, p
+
+            # jump every mode of the displacement from the resting shape at once
+            rest = self.static(boundary)
+            q = np.stack((dst(x[1:-1] - rest[1:-1]), dst(p[1:-1] - rest[1:-1])), -1)
+            q = (np.linalg.matrix_power(self.matrices, steps) @ q[:, :, None])[:, :, 0]
+
+            x, p = rest.copy(), rest.copy()
+            x[1:-1] += idst(q[:, 0])
+            p[1:-1] += idst(q[:, 1])
+            return x, p
+
+    def fast_forward(self, string, steps, t):
+        ''' jump a waves.string2.String forward in place, holding its driven end at string.function(t)
+
+        only the verlet scheme steps like the modes, a step size of h being the original step with k h^2 and c h,
+        so strings using the other integrators are refused
+        '''
+        if string.integrator != 'verlet':
+            raise ValueError(f'only verlet strings can be fast forwarded, not {string.integrator} ones')
+        h = string.step_size
+        k, c = string.k * h * h, string.c * h
+        modes = self if (len(string.points), k, c) == (self.resolution, self.k, self.c) else SpringModes(len(string.points), k, c)
+        string.points, string.points_p = modes.advance(string.points, string.points_p, steps, string.function(t))
+        string.velocities = (string.points - string.points_p) / h
+
+
+
+### ROUND ROBIN STRING
+
+class RingModes:
+    ''' jumps the state of a waves.string3.String through any number of steps with its source held still
+
+    the right and left moving halves make one ring of 2 * resolution places, right[0] .. right[-1] then left[-1] .. left[0],
+    every step rotates the ring by one place, scaling by the reflection whenever a value wraps past either end
+    '''
+
+    def __init__(self, resolution, reflection=string3.REFLECTION):
+        self.resolution = resolution
+        self.reflection = reflection
+
+    def ring(self, left, right):
+        ''' return the ring of a string's left and right moving halves '''
+        return np.concatenate((np.asarray(right, dtype=float), np.asarray(left, dtype=float)[::-1]))
+
+    def halves(self, ring):
+        ''' return the (left, right) halves of a ring '''
+        return ring[self.resolution:][::-1].copy(), ring[:self.resolution].copy()
+
+    def static(self, source):
+        ''' return the ring the string settles into with its source held at source '''
+        r = self.reflection
+        if source == 0:
+            return np.zeros(2 * self.resolution)
+        if r * r == 1:
+            raise ValueError('a string with total reflection never settles under a constant source')
+        right = r * source / (1 - r * r) # what comes back in after the source end
+        left = r * right # after bouncing off the far end too
+        return np.repeat((right, left), self.resolution)
+
+    def advance(self, left, right, steps, source):
+        ''' return (left, right) as arrays after steps updates with the source held at source '''
+        with timing.stage('modal.ring'):
+            size = 2 * self.resolution
+            rest = self.static(source)
+            deviation = self.ring(left, right) - rest
+
+            # every place moves steps places on, picking up a reflection for each end it wraps past
+            places = np.arange(size)
+            crossings = (places + steps) // self.resolution - places // self.resolution
+            ring = rest.copy()
+            ring[(places + steps) % size] += deviation * float(self.reflection) ** crossings
+            return self.halves(ring)
+
+    def fast_forward(self, string, steps, t):
+        ''' jump a waves.string3.String forward in place with its own reflection, holding its source at string.function(t) '''
+        modes = self if (len(string.left), string.reflection) == (self.resolution, self.reflection) else RingModes(len(string.left), string.reflection)
+        left, right = modes.advance(string.left, string.right, steps, string.function(t))
+        string.left, string.right = left.tolist(), right.tolist()
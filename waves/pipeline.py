@@ -0,0 +1,126 @@
+# run a simulation on its own thread and hand rendered frames over to the display
+#
+# the worker steps the simulation at its own rate and renders into a small ring of preallocated frame buffers,
+# the display grabs whichever frame is newest without waiting and frames it never got to are simply dropped
+# the numpy kernels release the gil while they crunch, so the display thread stays responsive
+
+
+
+### CONFIG
+
+FRAMES = 3 # number of frame buffers: one being written, one waiting, one being displayed
+
+
+
+### IMPORTS
+
+import time
+import queue
+import threading
+import numpy as np
+from . import timing
+
+
+
+### CLASSES
+
+class FrameRing:
+    ''' a ring of preallocated frame buffers shared by one writer and one reader '''
+
+    def __init__(self, shape, dtype=np.uint8, frames=FRAMES):
+        self.frames = [np.zeros(shape, dtype=dtype) for i in range(frames)]
+        self.lock = threading.Lock() # only ever held for a few assignments
+        self.latest = None # index of the newest finished frame
+        self.reading = None # index of the frame the reader is holding on to
+        self.unread = False # whether the newest frame has been read yet
+        self.published = 0 # number of frames finished so far
+        self.dropped = 0 # number of frames that were replaced before anyone read them
+
+    def acquire(self):
+        ''' return the index and buffer of a frame that is safe for the writer to fill '''
+        with self.lock:
+            for i in range(len(self.frames)):
+                if i != self.latest and i != self.reading:
+                    return i, self.frames[i]
+
+    def publish(self, index):
+        ''' make a filled frame the newest one '''
+        with self.lock:
+            if self.unread:
+                self.dropped += 1
+            self.latest = index
+            self.unread = True
+            self.published += 1
+
+    def read(self):
+        ''' return the newest frame and whether it is new since the last read, the frame is None until there is one
+
+        the frame stays untouched by the writer until the next read
+        '''
+        with self.lock:
+            if self.latest is None:
+                return None, False
+            self.reading = self.latest
+            fresh, self.unread = self.unread, False
+            return self.frames[self.reading], fresh
+
+class Pipeline:
+    ''' steps a fluid simulation on a worker thread, publishing rendered frames into a FrameRing '''
+
+    def __init__(self, simulation, sweeps=1, rate=None, after_frame=None):
+        ''' sweeps steps are taken per frame, at most rate steps per second (or as fast as possible if None)
+
+        after_frame is called with the simulation on the worker thread after the steps of every frame
+        '''
+        self.simulation = simulation
+        self.sweeps = sweeps
+        self.rate = rate
+        self.after_frame = after_frame
+        self.ring = FrameRing(simulation.dimensions + (4,))
+        self.commands = queue.SimpleQueue()
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='simulation', daemon=True)
+
+    def start(self):
+        ''' start the worker thread '''
+        self.thread.start()
+        return self
+
+    def stop(self):
+        ''' stop the worker thread and wait for it to finish its current frame '''
+        self.stopping.set()
+        self.thread.join()
+
+    def submit(self, func, *args):
+        ''' run func(*args) on the worker thread before its next step, e.g. submit(simulation.force, position, force) '''
+        self.commands.put((func, args))
+
+    def latest(self):
+        ''' return the newest rendered frame and whether it is new, without blocking '''
+        return self.ring.read()
+
+    def run(self):
+        ''' the worker loop '''
+        next_frame = time.perf_counter()
+        while not self.stopping.is_set():
+            # apply anything the display thread asked for
+            while True:
+                try:
+                    func, args = self.commands.get_nowait()
+                except queue.Empty:
+                    break
+                func(*args)
+
+            for i in range(self.sweeps):
+                self.simulation.step()
+            if self.after_frame: self.after_frame(self.simulation)
+
+            with timing.stage('fluid.draw'):
+                index, frame = self.ring.acquire()
+                self.simulation.render(frame)
+                self.ring.publish(index)
+
+            # hold back to the requested rate, without trying to catch up after falling behind
+            if self.rate:
+                next_frame = max(next_frame + self.sweeps / self.rate, time.perf_counter())
+                self.stopping.wait(next_frame - time.perf_counter())
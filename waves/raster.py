@@ -0,0 +1,84 @@
+# a tiny software rasterizer for drawing frames without a window or opengl
+#
+# the drawing functions take the same arguments as the ones in waves.display,
+# with a Canvas in place of the pyglet window, so a front end can draw to either
+
+
+
+### IMPORTS
+
+import numpy as np
+
+
+
+### CLASSES
+
+class Canvas:
+    ''' an rgb image to draw on, using the same bottom left origin as pyglet '''
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.image = np.zeros((height, width, 3), dtype=np.uint8) # rows run top to bottom
+
+    def clear(self):
+        ''' fill the canvas with black, like window.clear() '''
+        self.image[:] = 0
+
+    def plot(self, xs, ys, color):
+        ''' set the pixels at the given screen coordinates, ignoring any off the canvas '''
+        xs = np.rint(xs).astype(int)
+        ys = np.rint(ys).astype(int)
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        self.image[self.height - 1 - ys[inside], xs[inside]] = color
+
+    def line_strip(self, xs, ys, color):
+        ''' draw connected line segments through the given screen coordinates '''
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        if len(xs) < 2:
+            return self.plot(xs, ys, color)
+
+        # walk every segment one pixel at a time along its longer axis
+        dx = np.diff(xs)
+        dy = np.diff(ys)
+        steps = np.ceil(np.maximum(np.abs(dx), np.abs(dy))).astype(int) + 1
+        segment = np.repeat(np.arange(len(steps)), steps)
+        first = np.repeat(np.cumsum(steps) - steps, steps)
+        t = (np.arange(steps.sum()) - first) / np.repeat(np.maximum(steps - 1, 1), steps)
+        self.plot(xs[segment] + dx[segment] * t, ys[segment] + dy[segment] * t, color)
+
+
+
+### DRAWING STUFF
+
+def draw_origin(canvas, color):
+    ''' draw the line through the middle of the canvas '''
+    y = canvas.height / 2
+    canvas.line_strip((0, canvas.width), (y, y), color)
+
+def draw_plot(canvas, values, color, x_scale=None):
+    ''' draw a sequence of displacements across the canvas as a line '''
+    values = np.asarray(values, dtype=float)
+    if x_scale is None: x_scale = canvas.width / len(values)
+    h = canvas.height / 2
+    canvas.line_strip(np.arange(len(values)) * x_scale, values * h + h, color)
+
+def draw_envelope(canvas, mins, maxs, color):
+    ''' draw a min/max envelope with one column per pixel '''
+    columns = len(mins)
+    h = canvas.height / 2
+    xs = np.repeat(np.arange(columns) * canvas.width / columns, 2)
+    ys = np.empty(columns * 2)
+    ys[0::2] = np.asarray(mins) * h + h
+    ys[1::2] = np.asarray(maxs) * h + h
+    canvas.line_strip(xs, ys, color)
+
+def draw_image(canvas, image):
+    ''' stretch an image over the whole canvas without smoothing, like blitting a GL_NEAREST texture
+
+    the image is indexed (row, column, channel) with row 0 at the bottom, as pyglet image data is
+    '''
+    rows = np.arange(canvas.height) * image.shape[0] // canvas.height
+    columns = np.arange(canvas.width) * image.shape[1] // canvas.width
+    canvas.image[:] = image[:, :, :3].take(rows[::-1], 0).take(columns, 1)
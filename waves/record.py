@@ -0,0 +1,125 @@
+# write rendered frames to disk as an uncompressed y4m video or a png sequence
+#
+# frames are encoded on a pool of worker threads (numpy and zlib let go of the gil while they work)
+# and written out in order, with only a fixed number of frames in flight at once,
+# so memory use stays the same however long the recording runs
+
+
+
+### CONFIG
+
+WORKERS = 4 # number of encoding threads
+BACKLOG = 8 # most frames waiting to be encoded and written at once
+PNG_COMPRESSION = 6 # zlib compression level for png frames
+
+
+
+### IMPORTS
+
+import os
+import zlib
+import struct
+import collections
+import concurrent.futures
+import numpy as np
+
+
+
+### WRITERS
+
+class Y4MWriter:
+    ''' writes frames to one uncompressed yuv4mpeg2 (4:4:4) video file '''
+
+    def __init__(self, filename, width, height, fps):
+        self.file = open(filename, 'wb')
+        self.file.write(f'YUV4MPEG2 W{width} H{height} F{fps}:1 Ip A1:1 C444\n'.encode())
+
+    @staticmethod
+    def encode(image):
+        ''' convert an rgb frame into a y4m frame, using bt.601 studio range '''
+        r, g, b = (image[..., i].astype(np.float32) for i in range(3))
+        y = 16 + (65.738 * r + 129.057 * g + 25.064 * b) / 256
+        u = 128 + (-37.945 * r - 74.494 * g + 112.439 * b) / 256
+        v = 128 + (112.439 * r - 94.154 * g - 18.285 * b) / 256
+        planes = np.rint(np.stack((y, u, v))).astype(np.uint8)
+        return b'FRAME\n' + planes.tobytes()
+
+    def write(self, data):
+        ''' append an encoded frame '''
+        self.file.write(data)
+
+    def close(self):
+        self.file.close()
+
+class PNGWriter:
+    ''' writes frames to a directory as numbered png files '''
+
+    def __init__(self, directory, width, height, fps, pattern='frame_{:06d}.png'):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.pattern = pattern
+        self.count = 0
+
+    @staticmethod
+    def chunk(kind, data):
+        ''' return a png chunk '''
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    @staticmethod
+    def encode(image):
+        ''' convert an rgb frame into png file data '''
+        height, width = image.shape[:2]
+        # every row starts with a filter type byte, 0 meaning no filter
+        rows = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+        rows[:, 1:] = image.reshape(height, width * 3)
+        return (b'\x89PNG\r\n\x1a\n'
+                + PNGWriter.chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+                + PNGWriter.chunk(b'IDAT', zlib.compress(rows.tobytes(), PNG_COMPRESSION))
+                + PNGWriter.chunk(b'IEND', b''))
+
+    def write(self, data):
+        ''' write an encoded frame to the next file '''
+        with open(os.path.join(self.directory, self.pattern.format(self.count)), 'wb') as f:
+            f.write(data)
+        self.count += 1
+
+    def close(self):
+        pass
+
+def writer(path, width, height, fps):
+    ''' return a y4m writer for paths ending in .y4m, or a png sequence writer for anything else '''
+    if path.lower().endswith('.y4m'):
+        return Y4MWriter(path, width, height, fps)
+    return PNGWriter(path, width, height, fps)
+
+
+
+### RECORDER
+
+class Recorder:
+    ''' encodes frames on a pool of threads and writes them out in order '''
+
+    def __init__(self, writer, workers=WORKERS, backlog=BACKLOG):
+        self.writer = writer
+        self.backlog = backlog
+        self.pool = concurrent.futures.ThreadPoolExecutor(workers)
+        self.pending = collections.deque()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, image):
+        ''' queue an rgb frame, waiting for older frames to be written if too many are in flight '''
+        self.pending.append(self.pool.submit(self.writer.encode, image.copy()))
+        while len(self.pending) > self.backlog:
+            self.writer.write(self.pending.popleft().result())
+
+    def close(self):
+        ''' write out every queued frame and finish the file '''
+        while self.pending:
+            self.writer.write(self.pending.popleft().result())
+        self.pool.shutdown()
+        self.writer.close()
@@ -0,0 +1,215 @@
+# block structured grid refinement for the fluid simulation
+#
+# blocks of the coarse lattice (picked by hand or by how much they swirl) get their own finer lattice,
+# which takes ratio smaller steps for every coarse step with a relaxation rate rescaled to keep the viscosity the same
+# the fine lattice overlaps the coarse one by one coarse cell on every side,
+# that overlap is driven from the coarse lattice (interpolated in space and time)
+# and the coarse cells under the block are overwritten with the averaged fine result after every step
+# populations are carried across as equilibrium plus a rescaled non equilibrium part
+
+
+
+### CONFIG
+
+RATIO = 2 # how many times finer the refined lattices are
+BLOCK = 10 # size of the square blocks of the coarse lattice that can be refined
+THRESHOLD = 0.02 # vorticity above which a block is refined when adapting automatically
+REGRID = 20 # how many coarse steps between checks of which blocks need refining
+
+
+
+### IMPORTS
+
+import numpy as np
+from . import timing
+from .fluid import Simulation, DIMENSIONS, OMEGA, equilibrium, macroscopic, relaxation
+
+
+
+### FUNCTIONS
+
+def interpolation(cells, ratio):
+    ''' return, for every fine cell along an axis, the coarse cell to its left and how far along towards the next one it is
+
+    the fine cells cover cells coarse cells starting one cell into a gathered region that has two spare cells on each side
+    '''
+    position = (np.arange(cells * ratio) + .5) / ratio + .5
+    left = np.floor(position).astype(int)
+    return left, position - left
+
+def vorticity(simulation):
+    ''' return the magnitude of the vorticity at every node of a simulation '''
+    w, h = simulation.lattice.dimensions
+    rho, ux, uy = macroscopic(simulation.get_populations(range(w), range(h)))
+    # the lattice is periodic so use wrapping central differences
+    # (rows run south while uy points north, hence the sum)
+    duy_dx = (np.roll(uy, -1, 0) - np.roll(uy, 1, 0)) / 2
+    dux_dy = (np.roll(ux, -1, 1) - np.roll(ux, 1, 1)) / 2
+    return np.abs(duy_dx + dux_dy)
+
+def flag(simulation, threshold=THRESHOLD, block=BLOCK):
+    ''' return the origin and size of every block whose vorticity goes above threshold '''
+    field = vorticity(simulation)
+    w, h = field.shape
+    flagged = list()
+    for x in range(0, w, block):
+        for y in range(0, h, block):
+            if field[x:x + block, y:y + block].max() > threshold:
+                flagged.append(((x, y), (min(block, w - x), min(block, h - y))))
+    return flagged
+
+
+
+### CLASSES
+
+class Patch:
+    ''' a finer lattice covering a block of the coarse lattice '''
+
+    def __init__(self, coarse, origin, size, ratio=RATIO):
+        self.coarse = coarse
+        self.origin = origin
+        self.size = size
+        self.ratio = ratio
+        x0, y0 = origin
+        w, h = size
+        cw, ch = coarse.lattice.dimensions
+
+        # the coarse cells to interpolate from: the block plus two cells on every side
+        self.xs = [(x0 + i) % cw for i in range(-2, w + 2)]
+        self.ys = [(y0 + i) % ch for i in range(-2, h + 2)]
+
+        # the fine lattice covers the block plus one coarse cell of overlap on every side
+        self.fine = Simulation((ratio * (w + 2), ratio * (h + 2)), relaxation(coarse.omega, ratio))
+        self.fine.name = 'fluid.refine' # timed inside the coarse fluid.refine stage, not as coarse steps
+        fw, fh = self.fine.lattice.dimensions
+        self.fine_xs = range(fw)
+        self.fine_ys = range(fh)
+
+        # precomputed bilinear interpolation tables from the gathered coarse region to the fine lattice
+        self.ix, self.fx = interpolation(w + 2, ratio)
+        self.iy, self.fy = interpolation(h + 2, ratio)
+
+        # the non equilibrium part of the populations scales with the relaxation time over the time step
+        self.to_fine = (1 / self.fine.omega) / (ratio * (1 / coarse.omega))
+        self.to_coarse = 1 / self.to_fine
+
+        # the overlap ring split up into four strips of (columns, rows)
+        r = ratio
+        self.ring = (
+            (range(0, r), range(0, fh)),
+            (range(fw - r, fw), range(0, fh)),
+            (range(r, fw - r), range(0, r)),
+            (range(r, fw - r), range(fh - r, fh)),
+            )
+
+        # start the fine lattice off as an interpolation of the coarse one
+        self.fine.set_populations(self.fine_xs, self.fine_ys, self.prolong(self.gather()))
+
+    def gather(self):
+        ''' return the populations of the coarse cells this patch interpolates from '''
+        return self.coarse.get_populations(self.xs, self.ys)
+
+    def prolong(self, populations):
+        ''' return fine lattice populations interpolated from gathered coarse populations '''
+        rho, ux, uy = macroscopic(populations)
+        fields = np.concatenate(((rho, ux, uy), populations - equilibrium(rho, ux, uy)))
+
+        # bilinear interpolation, one axis at a time
+        fields = fields[:, self.ix, :] * (1 - self.fx)[:, None] + fields[:, self.ix + 1, :] * self.fx[:, None]
+        fields = fields[:, :, self.iy] * (1 - self.fy) + fields[:, :, self.iy + 1] * self.fy
+        rho, ux, uy, non_equilibrium = fields[0], fields[1], fields[2], fields[3:]
+        return equilibrium(rho, ux, uy) + self.to_fine * non_equilibrium
+
+    def restrict(self):
+        ''' overwrite the coarse cells under the block with the average of the fine cells over them '''
+        r = self.ratio
+        w, h = self.size
+        fw, fh = self.fine.lattice.dimensions
+        populations = self.fine.get_populations(range(r, fw - r), range(r, fh - r))
+        rho, ux, uy = macroscopic(populations)
+        non_equilibrium = populations - equilibrium(rho, ux, uy)
+
+        # average each ratio x ratio group of fine cells, conserving mass and momentum
+        average = lambda a: a.reshape(a.shape[:-2] + (w, r, h, r)).mean((-3, -1))
+        mass = average(rho)
+        ux = average(rho * ux) / mass
+        uy = average(rho * uy) / mass
+        coarse = equilibrium(mass, ux, uy) + self.to_coarse * average(non_equilibrium)
+        self.coarse.set_populations(self.xs[2:-2], self.ys[2:-2], coarse)
+
+    def spread(self, forces):
+        ''' return the fine lattice share of a coarse (2, width, height) force field for one sub step
+
+        every fine cell under a coarse cell gets the coarse force over ratio on each of the ratio sub steps,
+        so once restricted the block picks up the same momentum the coarse lattice would have
+        '''
+        r = self.ratio
+        field = forces[:, self.xs[1:-1], :][:, :, self.ys[1:-1]]
+        return np.repeat(np.repeat(field, r, 1), r, 2) / r
+
+    def advance(self, before, forces=None):
+        ''' sub cycle the fine lattice through one coarse step, given the gathered coarse populations from before it
+        and the coarse force field applied during it, if any
+        '''
+        after = self.gather()
+        field = None if forces is None else self.spread(forces)
+        for i in range(self.ratio):
+            # drive the overlap from the coarse lattice, interpolated to the time of this sub step
+            a = i / self.ratio
+            driven = self.prolong((1 - a) * before + a * after)
+            for xs, ys in self.ring:
+                self.fine.set_populations(xs, ys, driven[:, xs.start:xs.stop, ys.start:ys.stop])
+            self.fine.step(field)
+        self.restrict()
+
+class RefinedSimulation(Simulation):
+    ''' a fluid simulation where some blocks of the lattice run on finer lattices '''
+
+    def __init__(self, dimensions=DIMENSIONS, omega=OMEGA, ratio=RATIO, threshold=None, block=BLOCK, regrid=REGRID):
+        ''' threshold turns on automatic refinement of blocks whose vorticity goes above it '''
+        super().__init__(dimensions, omega)
+        self.ratio = ratio
+        self.threshold = threshold
+        self.block = block
+        self.regrid = regrid
+        self.steps = 0
+        self.patches = dict()
+        self.pinned = set() # origins refined by hand, which adapt() leaves alone
+
+    def patch(self, origin, size):
+        ''' return the patch for the block at origin, making it if the block isn't refined yet '''
+        if origin not in self.patches:
+            self.patches[origin] = Patch(self, origin, size, self.ratio)
+        return self.patches[origin]
+
+    def refine(self, origin, size):
+        ''' run the block of the lattice at origin with the given size on a finer lattice, whatever adapt() thinks of it '''
+        self.pinned.add(origin)
+        return self.patch(origin, size)
+
+    def coarsen(self, origin):
+        ''' go back to running the block at origin on the coarse lattice only '''
+        self.pinned.discard(origin)
+        self.patches.pop(origin, None)
+
+    def adapt(self):
+        ''' refine the blocks that are swirling and coarsen the ones that calmed down, except the ones refined by hand '''
+        flagged = dict(flag(self, self.threshold, self.block))
+        for origin in list(self.patches):
+            if origin not in flagged and origin not in self.pinned:
+                self.patches.pop(origin)
+        for origin, size in flagged.items():
+            self.patch(origin, size)
+
+    def step(self):
+        ''' perform a single coarse step, sub cycling every refined block '''
+        if self.threshold is not None and self.steps % self.regrid == 0:
+            self.adapt()
+        # the refined blocks need the force field too, or restricting them would throw away the impulses under them
+        forces = self.gather_forces()
+        before = [patch.gather() for patch in self.patches.values()]
+        super().step(forces)
+        with timing.stage('fluid.refine'):
+            for patch, populations in zip(self.patches.values(), before):
+                patch.advance(populations, forces)
+        self.steps += 1
@@ -0,0 +1,134 @@
+# change the sample rate of plots with a polyphase windowed sinc filter
+# and generate evenly spaced time bases on demand instead of keeping them around as arrays
+#
+# the ratio between the rates is made into a fraction up / down, conceptually the signal is stuffed with
+# up - 1 zeros between samples, low pass filtered and every down'th sample kept, but only the filter taps
+# that land on real samples are ever multiplied (one bank of taps per phase) and only the kept samples computed
+
+
+
+### CONFIG
+
+TAPS = 16 # zero crossings of the sinc on each side of the centre, more is sharper but slower
+BETA = 8.6 # kaiser window shape, more trades a wider transition for less ripple
+MAX_DENOMINATOR = 1000 # rate ratios are rounded to fractions no more complicated than this
+CHUNK = 1 << 13 # output samples computed at once, which bounds the memory used
+
+
+
+### IMPORTS
+
+import math
+import numbers
+import numpy as np
+from fractions import Fraction
+
+
+
+### TIME BASES
+
+class TimeBase:
+    ''' the times of count samples taken at rate starting at start, computed when asked for
+
+    behaves like the array np.arange(count) * (1 / rate) + start without storing it
+    '''
+
+    def __init__(self, count, rate, start=0):
+        self.count = int(count)
+        self.rate = rate
+        self.start = start
+        self.step = 1 / rate
+
+    @classmethod
+    def over(cls, duration, rate, start=0):
+        ''' return the time base covering duration seconds '''
+        return cls(math.ceil(duration * rate), rate, start)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        ''' return the time of sample i, or a time base for a slice of samples '''
+        if isinstance(i, slice):
+            first, stop, stride = i.indices(self.count)
+            return TimeBase(len(range(first, stop, stride)), self.rate / stride, self[first] if first < self.count else self.start)
+        if isinstance(i, numbers.Integral):
+            if i < 0: i += self.count
+            if not 0 <= i < self.count:
+                raise IndexError('time base index out of range')
+            return self.start + i * self.step
+        return self.start + np.asarray(i) * self.step
+
+    def __iter__(self):
+        return (self.start + i * self.step for i in range(self.count))
+
+    def __array__(self, dtype=None, copy=None):
+        return (self.start + np.arange(self.count) * self.step).astype(dtype or float)
+
+    def __repr__(self):
+        return f'TimeBase({self.count}, {self.rate:g}, start={self.start:g})'
+
+def rate_of(domain):
+    ''' return the sample rate of a time base or any evenly spaced sequence of times '''
+    if isinstance(domain, TimeBase):
+        return domain.rate
+    return 1 / (domain[1] - domain[0])
+
+
+
+### RESAMPLING
+
+class Resampler:
+    ''' converts plots from one sample rate to another '''
+
+    def __init__(self, rate_in, rate_out, taps=TAPS, beta=BETA):
+        ratio = Fraction(rate_out / rate_in).limit_denominator(MAX_DENOMINATOR)
+        self.up, self.down = ratio.numerator, ratio.denominator
+        self.taps = taps
+
+        # the low pass cuts off at the lower of the two nyquist frequencies
+        cutoff = 1 / (2 * max(self.up, self.down)) # cycles per stuffed sample
+        centre = taps * max(self.up, self.down) # the sinc crosses zero every max(up, down) stuffed samples
+        length = 2 * centre + 1
+        n = np.arange(length) - centre
+        h = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(length, beta)
+
+        # split the filter into one bank of taps per phase, in the order they meet the input
+        self.width = -(-length // self.up) # taps per phase
+        h = np.concatenate((h, np.zeros(self.width * self.up - length)))
+        self.bank = h.reshape(self.width, self.up).T[:, ::-1].copy()
+        self.bank /= self.bank.sum(1, keepdims=True) # every phase passes a constant through exactly
+        self.centre = centre
+
+    def length(self, count):
+        ''' return how many samples a plot of count samples turns into '''
+        return -(-count * self.up // self.down)
+
+    def blocks(self, plot, size=CHUNK):
+        ''' yield the resampled plot in blocks of at most size samples '''
+        x = np.asarray(plot, dtype=float)
+        total = self.length(len(x))
+        if self.up == self.down:
+            for first in range(0, total, size):
+                yield x[first:first + size].copy()
+            return
+
+        # hold the end values past either edge instead of fading in from silence
+        pad = self.width + 1
+        x = np.pad(x, pad, mode='edge')
+        offsets = np.arange(self.width)
+        for first in range(0, total, size):
+            n = np.arange(first, min(total, first + size))
+            position = n * self.down + self.centre # in stuffed samples, where the filter ends
+            phase = position % self.up
+            last = position // self.up # newest input sample the filter reaches
+            window = x[(last + pad - self.width + 1)[:, None] + offsets[None, :]]
+            yield np.einsum('ij,ij->i', window, self.bank[phase])
+
+    def __call__(self, plot):
+        ''' return the whole plot resampled as an array '''
+        return np.concatenate(list(self.blocks(plot)) or [np.zeros(0)])
+
+def resample(plot, rate_in, rate_out, taps=TAPS, beta=BETA):
+    ''' return a plot converted from one sample rate to another '''
+    return Resampler(rate_in, rate_out, taps, beta)(plot)
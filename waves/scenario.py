@@ -0,0 +1,196 @@
+# declarative setups for the simulations, read from json scenario files
+#
+# a scenario names its solver and gives whichever settings it wants to change, e.g.
+#
+#     {"solver": "string2", "resolution": 300, "drive": {"shape": "sine", "amp": 0.5, "freq": 2}}
+#
+# driving functions and model waves are waveform specs, {"shape": ..., "amp": ..., "freq": ..., "phase": ...},
+# with the shapes taken from waves.waveform.SHAPES, and the expensive bits of setting up (initial lattices, rendered model waves)
+# are kept in waves.cache so running the same scenario again skips them
+
+
+
+### IMPORTS
+
+import os
+import copy
+import json
+import numpy as np
+from . import cache
+from .resample import TimeBase
+from .waveform import waveform
+
+
+
+### SCENARIOS
+
+# every setting a scenario can give for each solver, with the value used when it doesn't
+DEFAULTS = {
+    'fluid': {
+        'dimensions': [50, 50],
+        'viscosity': 0.02,
+        'refine_regions': [], # [[x, y], [width, height]] blocks to run on a finer lattice
+        'refine_threshold': None,
+        'disturbances': [], # {"position": [x, y], "size": [width, height], "rho": 5, "velocity": [ux, uy]}
+    },
+    'string1': {
+        'resolution': 500,
+        'wave_velocity': 0.25,
+        'components': [{'shape': 'sine', 'amp': 0.5, 'freq': 0.5, 'harmonics': 19}], # specs with harmonics get split up
+    },
+    'string2': {
+        'resolution': 500,
+        'drive': {'shape': 'sawtooth', 'amp': 0.25},
+        'integrator': 'verlet',
+        'step_size': 1,
+        'strength': 0.5,
+        'damping': 0.05,
+    },
+    'string3': {
+        'resolution': 500,
+        'reflection': 0.5,
+        'drives': [
+            {'shape': 'sawtooth', 'amp': 0.5, 'freq': 0.12},
+            {'shape': 'sine', 'amp': 0.5, 'freq': 0.12},
+            {'shape': 'pulse', 'amp': 0.5, 'start': 1, 'stop': 1.5},
+        ],
+    },
+    'spring': {
+        'duration': None, # seconds of the model to use, None for the whole of a wav file or spring.DURATION of a waveform
+        'model': {'shape': 'sawtooth', 'amp': -0.4, 'freq': 110}, # or the name of a .wav file
+        'strength': {'shape': 'sine', 'amp': 1.5e7, 'offset': 2e7}, # a plain number for a constant spring
+        'damping': {'shape': 'sine', 'amp': 7.5e7, 'phase': 0.25, 'offset': 1e8},
+        'integrator': 'verlet',
+        'rate': None,
+    },
+}
+
+class Scenario:
+    ''' the settings for one run of one solver '''
+
+    def __init__(self, solver, name=None, directory='.', **settings):
+        if solver not in DEFAULTS:
+            raise ValueError(f'unknown solver {solver!r}, expected one of {", ".join(DEFAULTS)}')
+        unknown = set(settings) - set(DEFAULTS[solver])
+        if unknown:
+            raise ValueError(f'unknown {solver} settings {", ".join(sorted(unknown))}, expected some of {", ".join(DEFAULTS[solver])}')
+        self.solver = solver
+        self.name = name or solver
+        self.directory = directory # where relative file names in the settings are looked for
+        self.settings = dict(copy.deepcopy(DEFAULTS[solver]), **settings)
+
+    @classmethod
+    def load(cls, filename):
+        ''' read a scenario from a json file '''
+        with open(filename) as f:
+            data = json.load(f)
+        name = os.path.splitext(os.path.basename(filename))[0]
+        return cls(directory=os.path.dirname(filename), **dict({'name': name}, **data))
+
+    def __getitem__(self, setting):
+        return self.settings[setting]
+
+    def __repr__(self):
+        return f'Scenario({self.solver!r}, name={self.name!r})'
+
+    def build(self):
+        ''' return the state the scenario describes, ready to run '''
+        return BUILDERS[self.solver](self)
+
+    def path(self, filename):
+        ''' return a file name from the settings relative to the scenario file '''
+        return os.path.join(self.directory, filename)
+
+
+
+### BUILDERS
+
+def initial_lattice(scenario):
+    ''' return the starting populations of a fluid scenario, from the cache if it's been set up before '''
+    from .fluid import equilibrium
+    spec = {name: scenario[name] for name in ('dimensions', 'disturbances')}
+    def compute():
+        dimensions = tuple(scenario['dimensions'])
+        populations = equilibrium(np.ones(dimensions), 0, 0)
+        for disturbance in scenario['disturbances']:
+            (x, y), (w, h) = disturbance['position'], disturbance.get('size', (1, 1))
+            xs = np.arange(x, x + w)[:, None] % dimensions[0]
+            ys = np.arange(y, y + h)[None, :] % dimensions[1]
+            ux, uy = disturbance.get('velocity', (0, 0))
+            populations[:, xs, ys] = equilibrium(disturbance.get('rho', 1), ux, uy)[:, None, None]
+        return {'populations': populations}
+    return cache.fetch('fluid.lattice', spec, compute)['populations']
+
+def build_fluid(scenario):
+    ''' return the fluid simulation of a scenario '''
+    from .fluid import Simulation
+    from .refine import RefinedSimulation
+    dimensions = tuple(scenario['dimensions'])
+    omega = 1 / (3 * scenario['viscosity'] + .5)
+    if scenario['refine_regions'] or scenario['refine_threshold'] is not None:
+        simulation = RefinedSimulation(dimensions, omega, threshold=scenario['refine_threshold'])
+    else:
+        simulation = Simulation(dimensions, omega)
+
+    # the refined blocks start from the coarse lattice, so it has to be in place first
+    simulation.populations[:] = initial_lattice(scenario)
+    for origin, size in scenario['refine_regions']:
+        simulation.refine(tuple(origin), tuple(size))
+    return simulation
+
+def build_string1(scenario):
+    ''' return (components, sum, resolution) for a scenario of analytical waves, the components being (function, color) pairs '''
+    from . import string1
+    parts = [part for spec in scenario['components'] for part in waveform(spec).series()]
+    components = [string1.wave_func(part.cycle, part.amp, part.freq, part.phase, velocity=scenario['wave_velocity'])
+                  for part in parts]
+    return components, string1.wave_sum(*(func for func, color in components)), scenario['resolution']
+
+def build_string2(scenario):
+    ''' return the spring string of a scenario '''
+    from .string2 import String
+    return String(scenario['resolution'], waveform(scenario['drive']), scenario['integrator'], scenario['step_size'],
+                  scenario['strength'], scenario['damping'])
+
+def build_string3(scenario):
+    ''' return the round robin strings of a scenario, one per drive '''
+    from .string3 import String
+    return [String(scenario['resolution'], waveform(drive), scenario['reflection']) for drive in scenario['drives']]
+
+def model_plot(scenario):
+    ''' return the model wave of a spring scenario, rendered or loaded from the cache if it's been done before '''
+    from . import spring
+    duration = scenario['duration']
+    model = scenario['model']
+    if isinstance(model, str):
+        # a wav file, which counts as changed whenever it is touched, and is only cut short when asked
+        count = None if duration is None else int(duration * spring.SAMPLE_RATE)
+        path = scenario.path(model)
+        stat = os.stat(path)
+        spec = {'file': os.path.abspath(path), 'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'count': count}
+        compute = lambda: {'plot': np.array(spring.load_plot(path)[:count])}
+    else:
+        count = int((spring.DURATION if duration is None else duration) * spring.SAMPLE_RATE)
+        spec = {'model': model, 'rate': spring.SAMPLE_RATE, 'count': count}
+        compute = lambda: {'plot': np.array(spring.plot(waveform(model), TimeBase(count, spring.SAMPLE_RATE)))}
+    return cache.fetch('spring.model', spec, compute)['plot'].tolist()
+
+def build_spring(scenario):
+    ''' return (model plot, simulation) for a spring scenario '''
+    from .spring import Simulation
+    schedule = lambda spec: spec if isinstance(spec, (int, float)) else waveform(spec) # constants stay plain numbers
+    model = model_plot(scenario)
+    return model, Simulation(model, schedule(scenario['strength']), schedule(scenario['damping']),
+                             scenario['integrator'], scenario['rate'])
+
+BUILDERS = {
+    'fluid': build_fluid,
+    'string1': build_string1,
+    'string2': build_string2,
+    'string3': build_string3,
+    'spring': build_spring,
+}
+
+def load(filename):
+    ''' read a scenario from a json file '''
+    return Scenario.load(filename)
@@ -0,0 +1,100 @@
+# a precomputed oscilloscope view of a plot
+# everything expensive happens once up front so drawing a frame is just a binary search and a few lookups per column
+
+
+
+### IMPORTS
+
+import numpy as np
+
+
+
+### SCOPE STUFF
+
+class Scope:
+    ''' a min/max decimation pyramid and zero crossing index for a plot '''
+
+    def __init__(self, plot):
+        self.plot = np.asarray(plot, dtype=float)
+
+        # positions of the rising zero crossings, the first non-negative sample after a negative one
+        # (the plot is treated as looping, so the last sample leads into the first)
+        negative = self.plot < 0
+        self.crossings = np.flatnonzero(np.roll(negative, 1) & ~negative)
+
+        # level i of the pyramid holds the min and max of each block of 2 ** i samples
+        self.mins = [self.plot]
+        self.maxs = [self.plot]
+        while len(self.mins[-1]) > 1:
+            self.mins.append(self.decimate(self.mins[-1], np.minimum))
+            self.maxs.append(self.decimate(self.maxs[-1], np.maximum))
+
+    def __len__(self):
+        ''' return the number of samples in the plot '''
+        return len(self.plot)
+
+    @staticmethod
+    def decimate(level, reduce):
+        ''' halve a pyramid level by reducing neighbouring pairs '''
+        if len(level) % 2:
+            level = np.append(level, level[-1])
+        return reduce(level[0::2], level[1::2])
+
+    def sync(self, offset):
+        ''' return the position just after the first rising zero crossing after offset '''
+        if not len(self.crossings):
+            return offset
+        n = len(self)
+        base, position = divmod(offset, n)
+        i = np.searchsorted(self.crossings, position + 1)
+        if i == len(self.crossings):
+            # wrap around to the first crossing of the next loop
+            return (base + 1) * n + int(self.crossings[0]) + 1
+        return base * n + int(self.crossings[i]) + 1
+
+    def query(self, lo, hi):
+        ''' return the min and max of the samples in each half open range [lo, hi) of arrays of positions within the plot
+
+        the ranges are peeled off a level at a time like a segment tree, so each one costs a few steps per level
+        '''
+        lo, hi = lo.copy(), hi.copy()
+        mins = np.full(len(lo), np.inf)
+        maxs = np.full(len(lo), -np.inf)
+        for level_mins, level_maxs in zip(self.mins, self.maxs):
+            # a range starting on an odd block takes that block on its own before moving up a level
+            take = (lo < hi) & (lo % 2 == 1)
+            mins[take] = np.minimum(mins[take], level_mins[lo[take]])
+            maxs[take] = np.maximum(maxs[take], level_maxs[lo[take]])
+            lo += take
+            # and likewise a range ending just after an odd block
+            take = (lo < hi) & (hi % 2 == 1)
+            hi -= take
+            mins[take] = np.minimum(mins[take], level_mins[hi[take]])
+            maxs[take] = np.maximum(maxs[take], level_maxs[hi[take]])
+            lo >>= 1
+            hi >>= 1
+        return mins, maxs
+
+    def window(self, offset, size, columns):
+        ''' return the min and max of the plot for each screen column in a window of samples
+
+        the plot loops, so the window can start anywhere and run past the end back into the start
+        the cost only grows with the number of columns and the log of the plot's length, not with the length of the window
+        '''
+        n = len(self)
+        samples_per_column = size / columns
+
+        # the samples of each column, at least one each, starting within the plot
+        first = int(offset) % n + (np.arange(columns) * samples_per_column).astype(np.int64)
+        last = np.maximum(int(offset) % n + (np.arange(1, columns + 1) * samples_per_column).astype(np.int64), first + 1)
+        first, length = first % n, np.minimum(last - first, n)
+
+        # split the columns that cross the end of the plot into the part before the seam and the part after
+        mins, maxs = self.query(first, np.minimum(first + length, n))
+        wrapped = first + length > n
+        if wrapped.any():
+            tail = first[wrapped] + length[wrapped] - n
+            tail_mins, tail_maxs = self.query(np.zeros_like(tail), tail)
+            mins[wrapped] = np.minimum(mins[wrapped], tail_mins)
+            maxs[wrapped] = np.maximum(maxs[wrapped], tail_maxs)
+        return mins, maxs
@@ -0,0 +1,195 @@
+# try to replicate a model wave using a spring force simulation
+
+
+
+### CONFIG
+
+import numpy as np
+import wave
+from . import timing
+from .resample import TimeBase, Resampler, rate_of
+from .waveform import Waveform
+
+SAMPLE_RATE = 44100
+DURATION = 4 # seconds of model wave to make when it isn't loaded from a file
+DOMAIN = TimeBase.over(DURATION, SAMPLE_RATE) # domain of the plot, the times are only worked out as they are used
+INTEGRATOR = 'verlet' # one of INTEGRATORS
+INTEGRATORS = 'verlet', 'trapezoidal', 'rk4'
+
+
+
+### WAVE STUFF
+
+# periodic spring schedules, base * (1 + 0.75 sin(2pi t)), damping a quarter cycle ahead
+SPRING_STRENGTH = Waveform('sine', amp=15000000, offset=20000000)
+SPRING_DAMPING = Waveform('sine', amp=75000000, phase=.25, offset=100000000) # cosine
+
+class Simulation:
+    ''' simulate the replica numerically
+
+    the replica moves by x'' = k (m - x) + c / SAMPLE_RATE (m' - x'), m being the model,
+    which is what the original explicit 'verlet' scheme works out to at SAMPLE_RATE
+
+    given a rate the replica is stepped at that rate instead of the rate of the plot domain,
+    with the model resampled up or down to that rate and the result resampled back to the rate of the domain
+    '''
+    def __init__(self, model, k=SPRING_STRENGTH, c=SPRING_DAMPING, integrator=INTEGRATOR, rate=None):
+        if integrator not in INTEGRATORS:
+            raise ValueError(f'unknown integrator {integrator!r}, expected one of {", ".join(INTEGRATORS)}')
+        self.model = model
+        self.k = k # spring strength, constant or function of time
+        self.c = c # spring damping, constant or function of time
+        self.integrator = integrator
+        self.rate = rate # internal sample rate, None to step on the plot domain itself
+
+    def integrate(self, ppx, px, a, dt):
+        ''' integrate x+1 give x and x-1, acceleration and delta time '''
+        return 2 * px - ppx + a * dt ** 2
+
+    def spring(self, pa, a, pb, b, t, k=None, c=None):
+        ''' return the acceleration due to a spring between a and b on a '''
+        if k is None: k = self.k
+        if c is None: c = self.c
+        if callable(k): k = k(t)
+        if callable(c): c = c(t)
+        f = (b - a) * k # restoring force
+        va = a - pa # a velocity
+        vb = b - pb # b velocity
+        v = vb - va # b relative velocity
+        d = c * v # damping force
+        return f + d # ignoring mass differences
+
+    def coefficients(self, t):
+        ''' return the spring strength and the damping per second at time t '''
+        k = self.k(t) if callable(self.k) else self.k
+        c = self.c(t) if callable(self.c) else self.c
+        return k, c / SAMPLE_RATE
+
+    def plot(self, domain):
+        ''' run the simulation and plot the results '''
+        with timing.stage('spring.integrate'):
+            model = self.model[:len(domain)]
+            if self.rate is None:
+                return getattr(self, self.integrator)(model, domain)
+
+            # step at the internal rate and resample back to the rate of the domain
+            rate = rate_of(domain)
+            model = Resampler(rate, self.rate)(model)
+            internal = getattr(self, self.integrator)(model, TimeBase(len(model), self.rate, domain[0]))
+            replica = Resampler(self.rate, rate)(internal)[:len(domain)]
+            return np.pad(replica, (0, len(domain) - len(replica)), mode='edge').tolist()
+
+    def verlet(self, model, domain):
+        ''' plot the replica with the original explicit scheme '''
+        # the damping works on velocities per sample, so it gets rescaled when stepping at another rate
+        scale = 1 if self.rate is None else self.rate / SAMPLE_RATE
+
+        # fill the plot with the first two points in the model
+        # this is enough information to get started
+        # including initial position and velocity
+        plot = list(model[:2])
+
+        # run through the plot domain
+        for i, t0, t in intervals(domain):
+            dt = t - t0
+            ppx = plot[-2]
+            px = plot[-1]
+            ppm = model[i - 1]
+            pm = model[i]
+            if scale == 1:
+                a = self.spring(ppx, px, ppm, pm, t)
+            else:
+                c = self.c(t) if callable(self.c) else self.c
+                a = self.spring(ppx, px, ppm, pm, t, c=c * scale)
+            plot.append(self.integrate(ppx, px, a, dt))
+
+        # return the plot
+        return plot
+
+    def trapezoidal(self, model, domain):
+        ''' plot the replica with the implicit trapezoidal rule, which stays stable however stiff the spring is '''
+        plot = list(model[:2])
+        x = plot[-1]
+        v = (model[1] - model[0]) / (domain[1] - domain[0])
+        for i, t0, t1 in intervals(domain):
+            h = t1 - t0
+            m0, m1 = model[i - 1], model[i]
+            slope = (m1 - m0) / h # the model moves in a straight line between samples
+            k0, c0 = self.coefficients(t0)
+            k1, c1 = self.coefficients(t1)
+            a0 = k0 * (m0 - x) + c0 * (slope - v)
+
+            # x1 = x + h/2 (v + v1) and v1 = v + h/2 (a0 + a1) with a1 depending on x1 and v1, solved for v1
+            v1 = (v + h / 2 * (a0 + k1 * (m1 - x - h / 2 * v) + c1 * slope)) / (1 + h * h / 4 * k1 + h / 2 * c1)
+            x = x + h / 2 * (v + v1)
+            v = v1
+            plot.append(x)
+        return plot
+
+    def rk4(self, model, domain):
+        ''' plot the replica with classic runge kutta '''
+        plot = list(model[:2])
+        x = plot[-1]
+        v = (model[1] - model[0]) / (domain[1] - domain[0])
+        def acceleration(t, x, v, m, slope):
+            k, c = self.coefficients(t)
+            return k * (m - x) + c * (slope - v)
+        for i, t0, t1 in intervals(domain):
+            h = t1 - t0
+            m0, m1 = model[i - 1], model[i]
+            slope = (m1 - m0) / h
+            mid = (m0 + m1) / 2
+            dx1, dv1 = v, acceleration(t0, x, v, m0, slope)
+            dx2, dv2 = v + dv1 * h / 2, acceleration(t0 + h / 2, x + dx1 * h / 2, v + dv1 * h / 2, mid, slope)
+            dx3, dv3 = v + dv2 * h / 2, acceleration(t0 + h / 2, x + dx2 * h / 2, v + dv2 * h / 2, mid, slope)
+            dx4, dv4 = v + dv3 * h, acceleration(t1, x + dx3 * h, v + dv3 * h, m1, slope)
+            x = x + h / 6 * (dx1 + 2 * dx2 + 2 * dx3 + dx4)
+            v = v + h / 6 * (dv1 + 2 * dv2 + 2 * dv3 + dv4)
+            plot.append(x)
+        return plot
+
+def intervals(domain):
+    ''' yield (i, time of sample i - 1, time of sample i) for every sample of a domain from the third on
+
+    a time base is iterated rather than indexed, which keeps its per sample checks out of the integrator loops
+    '''
+    times = iter(domain) if isinstance(domain, TimeBase) else iter(np.asarray(domain, dtype=float).tolist())
+    t0 = None
+    for i, t1 in enumerate(times):
+        if i >= 2:
+            yield i, t0, t1
+        t0 = t1
+
+def plot(func, domain):
+    ''' plot a function given a domain '''
+    return list(map(func, domain))
+
+def save_plot(plot, filename):
+    ''' write a plot to a .wav file '''
+    with timing.stage('spring.save'):
+        with wave.open(filename, 'w') as w:
+            w.setnchannels(1)
+            w.setsampwidth(1)
+            w.setframerate(SAMPLE_RATE)
+            for sample in plot:
+                w.writeframesraw(bytes([max(0, min(255, int(sample * 255)))]))
+
+def load_plot(filename):
+    ''' read a plot from a .wav file '''
+    def read_frame(frame):
+        ''' convert a frame into a plot sample '''
+        frame = w.readframes(1)
+        # get the samples for each channel
+        def get_sample(i):
+            width = w.getsampwidth()
+            start = i * width
+            end = start + width
+            sample = int.from_bytes(frame[start:end], byteorder='little', signed=True)
+            return sample / 2 ** (8 * width)
+        samples = list(map(get_sample, range(w.getnchannels())))
+        # and average them for mononess bro
+        sample = sum(samples) / len(samples)
+        return sample
+    with timing.stage('spring.load'):
+        with wave.open(filename, 'r') as w:
+            return list(map(read_frame, range(w.getnframes())))
@@ -0,0 +1,59 @@
+# simulate a transverse wave on a string in 2d space
+# this will be an analytical solution
+# the state of the string will be computed as a function of time
+
+
+
+### CONFIG
+
+STRING_RES = 500
+WAVE_VELOCITY = 0.25 # in units of the length of the string (width of screen) per second
+COMPONENT_COLOR = (0, 63, 127) # color of individual strings
+
+
+
+### WAVE STUFF
+
+import math
+
+def wave_func(function, amp=1, freq=1, phase=0, fperiod=1, color=COMPONENT_COLOR, velocity=None):
+    ''' return a function that returns amplitude given position and time given a general function
+
+    amplitude is the multiplication factor of the result
+    frequency scales the input to the given function
+    phase offsets the input to the given function
+    fperiod is the period of the given function, used to normalize the function's period
+    velocity is how fast the wave travels, WAVE_VELOCITY if not given
+    '''
+
+    def func(x, t):
+        # see if any of the parameters are functions!!!
+        nonlocal amp, freq, phase
+        a = amp(t)   if callable(amp)   else amp
+        f = freq(t)  if callable(freq)  else freq
+        p = phase(t) if callable(phase) else phase
+        v = WAVE_VELOCITY if velocity is None else velocity
+        return a * function((t + p + x / v) * f * fperiod)
+
+    return func, color
+
+def wave_sum(*funcs):
+    ''' return a function that is the sum of multiple wave functions '''
+    return lambda x, t: sum(map(lambda f: f(x, t), funcs))
+
+def sample(wave_function, time, resolution=STRING_RES):
+    ''' return the displacement of the string at resolution + 1 evenly spaced points '''
+    return list(map(lambda i: wave_function(i / resolution, time), range(resolution + 1)))
+
+def set_wave_functions(*funcs):
+    ''' set the wave functions to be drawn as strings '''
+    global wave_functions, wave_function
+    wave_functions = funcs
+    wave_function = wave_sum(*tuple(map(lambda f: f[0], funcs)))
+
+# define the functions to draw here dude
+set_wave_functions(
+        *map(lambda i: wave_func(math.sin, amp=.5/i, freq=i/2, phase=.0, fperiod=2*math.pi),
+            range(1, 20))
+        )
+
@@ -0,0 +1,146 @@
+# simulate a transverse wave on a string in 2d space
+# using spring forces
+# this will be a live numerical solution
+#
+# the points move by x'' = k/2 lap(x) + c lap(x'), with time measured in steps and lap the second difference
+# between neighbours, 'verlet' is the original explicit scheme and the others trade more work per step
+# for stability, so stiff strings can take bigger steps
+
+
+
+### CONFIG
+
+STRING_RES = 500
+SPRING_STRENGTH = .5
+SPRING_DAMPING = .05
+INTEGRATOR = 'verlet' # one of INTEGRATORS
+STEP_SIZE = 1 # time step in units of the original step
+
+
+
+### CONSTANTS
+
+INTEGRATORS = 'verlet', 'trapezoidal', 'rk4'
+
+
+
+### IMPORTS
+
+import numpy as np
+from . import timing
+
+
+
+### STRING STUFF
+
+def laplacian(x, left):
+    ''' return the second difference of the interior points x, with the driven end at left and the far end at 0 '''
+    padded = np.concatenate(((left,), x, (0,)))
+    return padded[:-2] - 2 * x + padded[2:]
+
+class String:
+    ''' represents a string to simulate '''
+
+    def __init__(self, resolution, function, integrator=INTEGRATOR, step_size=STEP_SIZE,
+            k=SPRING_STRENGTH, c=SPRING_DAMPING):
+        if integrator not in INTEGRATORS:
+            raise ValueError(f'unknown integrator {integrator!r}, expected one of {", ".join(INTEGRATORS)}')
+        self.integrator = integrator
+        self.step_size = step_size
+        self.k = k
+        self.c = c
+
+        # these are the displacement points
+        self.points = np.zeros(resolution)
+
+        # and this is the previous state of them
+        self.points_p = self.points.copy()
+
+        # and how fast they are moving, per original step
+        self.velocities = self.points.copy()
+
+        # the function to fixate to the end of the string
+        self.function = function
+
+        # the mode tables for the trapezoidal rule, worked out on its first step
+        self.modes = None
+
+    def spring(self, a, pa, b, pb, k=None, c=None):
+        ''' return the acceleration due to a spring between a and b on a '''
+        if k is None: k = self.k
+        if c is None: c = self.c
+        f = (b - a) * k * .5 # restoring force
+        va = a - pa # a velocity
+        vb = b - pb # b velocity
+        v = vb - va # b relative velocity
+        d = c * v # damping force
+        return f + d # ignoring mass differences
+
+    def update(self, t, dt):
+        ''' update the simulation '''
+        with timing.stage('string2.update'):
+            # step the interior points, the ends are held
+            boundary = self.function(t)
+            x, v = getattr(self, self.integrator)(boundary)
+            points = np.concatenate(((boundary,), x, (0,)))
+            velocities = np.concatenate((((boundary - self.points[0]) / self.step_size,), v, (0,)))
+
+            # set the new state
+            self.points, self.points_p, self.velocities = points, self.points, velocities
+
+    def verlet(self, boundary):
+        ''' return the next interior points and velocities with the explicit scheme, the original one for a step size of 1 '''
+        h = self.step_size
+        x, p = self.points, self.points_p
+        v = x - p # velocity
+        # acceleration from the springs on the right and the left
+        a = self.spring(x[1:-1], p[1:-1], x[2:], p[2:], self.k * h * h, self.c * h) \
+          + self.spring(x[1:-1], p[1:-1], x[:-2], p[:-2], self.k * h * h, self.c * h)
+        points = x[1:-1] + v[1:-1] + a
+        return points, (points - x[1:-1]) / h
+
+    def derivatives(self, x, v, left, left_v):
+        ''' return the acceleration of the interior points x moving at v, with the driven end at left moving at left_v '''
+        return self.k / 2 * laplacian(x, left) + self.c * laplacian(v, left_v)
+
+    def rk4(self, boundary):
+        ''' return the next interior points and velocities with classic runge kutta, the driven end moving linearly to boundary '''
+        h = self.step_size
+        x, v = self.points[1:-1], self.velocities[1:-1]
+        b0 = self.points[0]
+        bv = (boundary - b0) / h
+        mid = b0 + bv * h / 2
+
+        x1, v1 = v, self.derivatives(x, v, b0, bv)
+        x2, v2 = v + v1 * h / 2, self.derivatives(x + x1 * h / 2, v + v1 * h / 2, mid, bv)
+        x3, v3 = v + v2 * h / 2, self.derivatives(x + x2 * h / 2, v + v2 * h / 2, mid, bv)
+        x4, v4 = v + v3 * h, self.derivatives(x + x3 * h, v + v3 * h, boundary, bv)
+
+        return x + h / 6 * (x1 + 2 * x2 + 2 * x3 + x4), v + h / 6 * (v1 + 2 * v2 + 2 * v3 + v4)
+
+    def trapezoidal(self, boundary):
+        ''' return the next interior points and velocities with the implicit trapezoidal rule, which never blows up
+
+        the sine transform turns the implicit solve into one 2x2 solve per mode
+        '''
+        from .modal import dst, idst
+        h = self.step_size
+        if self.modes is None:
+            n = len(self.points) - 2
+            self.modes = (-4 * np.sin(np.pi * np.arange(1, n + 1) / (2 * (n + 1))) ** 2, # eigenvalues of the second difference
+                          np.sin(np.pi * np.arange(1, n + 1) / (n + 1))) # how the driven end pushes on each mode
+        lam, edge = self.modes
+
+        b0 = self.points[0]
+        bv = (boundary - b0) / h
+        q = dst(self.points[1:-1])
+        r = dst(self.velocities[1:-1])
+
+        # a = k/2 (lam q + edge b) + c (lam r + edge b'), averaged over the start and end of the step
+        stiff, damp = self.k / 2 * lam, self.c * lam
+        a0 = stiff * q + damp * r + edge * (self.k / 2 * b0 + self.c * bv)
+        push = edge * (self.k / 2 * boundary + self.c * bv)
+        r1 = (r + h / 2 * (a0 + stiff * (q + h / 2 * r) + push)) / (1 - h * h / 4 * stiff - h / 2 * damp)
+        q1 = q + h / 2 * (r + r1)
+
+        return idst(q1), idst(r1)
@@ -0,0 +1,63 @@
+# simulate a transverse wave on a string in 2d space
+# this will be a simple progression of energy left and right
+# this will be a live numerical solution
+
+
+
+### CONFIG
+
+STRING_RES = 500
+REFLECTION = .5
+
+
+
+### IMPORTS
+
+from . import timing
+
+
+
+### STRING STUFF
+
+class String:
+    ''' represents a string to simulate '''
+
+    def __init__(self, resolution, function, reflection=REFLECTION):
+        # how much of the energy bounces back off the ends
+        self.reflection = reflection
+
+        # keep track of energy moving left and right both
+        self.left = [0] * resolution
+        self.right = [0] * resolution
+
+        # the function to fixate to the end of the string
+        self.function = function
+
+    def __len__(self):
+        ''' return the resolution of this string '''
+        return len(self.left)
+
+    def __getitem__(self, i):
+        ''' return the sum energy at a point on this string '''
+        return self.left[i] + self.right[i]
+
+    @property
+    def points(self):
+        ''' return the sum energy at every point on this string '''
+        return list(map(lambda l, r: l + r, self.left, self.right))
+
+    def update(self, t):
+        ''' update the simulation '''
+        with timing.stage('string3.update'):
+            # generate the sound source
+            source = self.function(t)
+
+            # go round robin
+            carry_right = self.right[-1]
+            carry_left = self.left[0] + source
+            for x in reversed(range(1, len(self))):
+                self.right[x] = self.right[x - 1]
+            self.right[0] = carry_left * self.reflection
+            for x in range(0, len(self) - 1):
+                self.left[x] = self.left[x + 1]
+            self.left[len(self) - 1] = carry_right * self.reflection
@@ -0,0 +1,111 @@
+# search for spring schedules that make the replica match a model
+# the model is shared with the worker processes instead of being pickled to each of them
+
+
+
+### CONFIG
+
+SWEEP_DEPTH = 0.75 # modulation depth of the swept schedules
+SWEEP_ROUNDS = 3 # number of zoomed in refinement rounds when fitting
+
+
+
+### IMPORTS
+
+import math
+import itertools
+import numpy as np
+from multiprocessing import Pool, shared_memory
+from .resample import TimeBase
+from .waveform import Waveform
+from .spring import Simulation, SAMPLE_RATE, SPRING_STRENGTH, SPRING_DAMPING, INTEGRATOR
+
+
+
+### FITTING STUFF
+
+# the model buffer as seen by a sweep worker process
+worker_model = None
+
+def error(replica, model, metric='rms'):
+    ''' return how badly a replica matches its model, lower is better '''
+    difference = np.asarray(replica, dtype=float) - np.asarray(model, dtype=float)
+    if not np.all(np.isfinite(difference)):
+        return math.inf
+    if metric == 'rms':
+        return float(np.sqrt(np.mean(difference ** 2)))
+    if metric == 'peak':
+        return float(np.max(np.abs(difference)))
+    raise ValueError(f'unknown error metric {metric!r}')
+
+def log_range(spec):
+    ''' parse a 'start:stop:count' string into log spaced values '''
+    start, stop, count = spec.split(':')
+    return np.geomspace(float(start), float(stop), int(count))
+
+def grid(strengths, dampings, depth=SWEEP_DEPTH):
+    ''' return (k, c) schedule pairs for every combination of base strength and damping
+
+    the schedules swing depth times their base either way, with the timing of the default schedules
+    '''
+    schedule = lambda base, default: Waveform('sine', base * depth, default.freq, default.phase, base)
+    return [(schedule(k, SPRING_STRENGTH), schedule(c, SPRING_DAMPING))
+            for k, c in itertools.product(strengths, dampings)]
+
+def attach_model(name, length):
+    ''' pool initializer: map the shared model buffer into this worker '''
+    global worker_model, worker_memory
+    worker_memory = shared_memory.SharedMemory(name=name)
+    worker_model = np.ndarray((length,), dtype=np.float64, buffer=worker_memory.buf)
+
+def evaluate(candidate):
+    ''' run the replica for one (k, c, metric, integrator, rate) candidate against the shared model '''
+    k, c, metric, integrator, rate = candidate
+    domain = TimeBase(len(worker_model), SAMPLE_RATE)
+    with np.errstate(all='ignore'):
+        replica = Simulation(worker_model, k, c, integrator, rate).plot(domain)
+    return error(replica, worker_model, metric), k, c
+
+class Sweep:
+    ''' evaluate spring schedules against one model across a pool of worker processes '''
+
+    def __init__(self, model, processes=None, metric='rms', integrator=INTEGRATOR, rate=None):
+        self.metric = metric
+        self.integrator = integrator
+        self.rate = rate
+        self.processes = processes
+        self.model = np.asarray(model, dtype=np.float64)
+
+    def __enter__(self):
+        # publish the model once, workers map it instead of receiving pickled copies
+        self.memory = shared_memory.SharedMemory(create=True, size=self.model.nbytes)
+        np.ndarray(self.model.shape, dtype=np.float64, buffer=self.memory.buf)[:] = self.model
+        self.pool = Pool(self.processes, attach_model, (self.memory.name, len(self.model)))
+        return self
+
+    def __exit__(self, *exc):
+        self.pool.terminate()
+        self.pool.join()
+        self.memory.close()
+        self.memory.unlink()
+
+    def run(self, candidates):
+        ''' return (error, k, c) for each candidate, best first '''
+        jobs = [(k, c, self.metric, self.integrator, self.rate) for k, c in candidates]
+        return sorted(self.pool.imap_unordered(evaluate, jobs), key=lambda result: result[0])
+
+    def fit(self, strengths, dampings, depth=SWEEP_DEPTH, rounds=SWEEP_ROUNDS):
+        ''' grid search, then repeatedly zoom the grid in around the best candidate so far '''
+        results = self.run(grid(strengths, dampings, depth))
+        for i in range(rounds):
+            _, k, c = results[0]
+            # shrink the grid to the neighbourhood of the best point in log space
+            k_step = (np.log(strengths[-1]) - np.log(strengths[0])) / max(1, len(strengths) - 1)
+            c_step = (np.log(dampings[-1]) - np.log(dampings[0])) / max(1, len(dampings) - 1)
+            strengths = np.exp(np.linspace(np.log(k.offset) - k_step, np.log(k.offset) + k_step, len(strengths)))
+            dampings = np.exp(np.linspace(np.log(c.offset) - c_step, np.log(c.offset) + c_step, len(dampings)))
+            key = lambda k, c: (round(math.log(k.offset), 6), round(math.log(c.offset), 6))
+            seen = set(key(k, c) for _, k, c in results)
+            candidates = [(k, c) for k, c in grid(strengths, dampings, depth) if key(k, c) not in seen]
+            results = sorted(results + self.run(candidates), key=lambda result: result[0])
+        return results
@@ -0,0 +1,136 @@
+# per stage wall time and call count instrumentation for the simulation loops
+#
+# wrap a stage in `with timing.stage('fluid.collide'):` to time it
+# while timing is disabled stage() hands back one shared do-nothing context,
+# so the instrumented loops only pay for a function call and a flag check
+
+
+
+### CONFIG
+
+import os
+
+HISTORY = 256 # number of recent durations kept per stage for the rolling histograms
+BINS = 8 # number of bins in the rolling histograms
+enabled = bool(os.environ.get('WAVES_PROFILE')) # set WAVES_PROFILE=1 to time everything
+
+
+
+### IMPORTS
+
+import json
+import time
+import collections
+import numpy as np
+
+
+
+### TIMING STUFF
+
+class Stage:
+    ''' accumulated timings for one named stage of a simulation loop '''
+
+    def __init__(self, name, history=HISTORY):
+        self.name = name
+        self.calls = 0
+        self.total = 0.0
+        self.recent = collections.deque(maxlen=history)
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        self.calls += 1
+        self.total += elapsed
+        self.recent.append(elapsed)
+
+    @property
+    def mean(self):
+        ''' return the mean duration of a call in seconds '''
+        return self.total / self.calls if self.calls else 0.0
+
+    @property
+    def last(self):
+        ''' return the duration of the latest call in seconds '''
+        return self.recent[-1] if self.recent else 0.0
+
+    def histogram(self, bins=BINS):
+        ''' return the counts and bin edges of the recent durations '''
+        return np.histogram(np.array(list(self.recent)), bins=bins)
+
+    def report(self, bins=BINS):
+        ''' return a json friendly summary of this stage '''
+        recent = np.array(list(self.recent))
+        counts, edges = np.histogram(recent, bins=bins) if len(recent) else ((), ())
+        return {
+            'calls': self.calls,
+            'total': self.total,
+            'mean': self.mean,
+            'recent_mean': float(recent.mean()) if len(recent) else 0.0,
+            'recent_p50': float(np.percentile(recent, 50)) if len(recent) else 0.0,
+            'recent_p95': float(np.percentile(recent, 95)) if len(recent) else 0.0,
+            'histogram': {'counts': list(map(int, counts)), 'edges': list(map(float, edges))},
+            }
+
+class Null:
+    ''' stands in for a stage while timing is disabled '''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+NULL = Null()
+
+# every stage that has been timed so far, by name
+# stages can be added by other threads at any time (the pipeline worker for one),
+# so anything going through them works on a snapshot, list() copies a dict or deque without letting go of the gil
+stages = dict()
+
+def stage(name):
+    ''' return a context manager that times the named stage, or does nothing if timing is disabled '''
+    if not enabled:
+        return NULL
+    s = stages.get(name)
+    if s is None:
+        s = stages.setdefault(name, Stage(name))
+    return s
+
+def enable(on=True):
+    ''' turn timing on or off '''
+    global enabled
+    enabled = on
+
+def disable():
+    ''' turn timing off '''
+    enable(False)
+
+def reset():
+    ''' forget all the timings so far '''
+    stages.clear()
+
+def report(bins=BINS):
+    ''' return a json friendly summary of every stage '''
+    return {name: s.report(bins) for name, s in list(stages.items())}
+
+def dump(filename, bins=BINS):
+    ''' write the summary of every stage to a json file '''
+    with open(filename, 'w') as f:
+        json.dump(report(bins), f, indent=2)
+
+def sparkline(s, bins=BINS):
+    ''' return the rolling histogram of a stage as a little bar chart string '''
+    if not s.recent:
+        return ''
+    counts, edges = s.histogram(bins)
+    bars = ' ▁▂▃▄▅▆▇█'
+    return ''.join(bars[int(round(c / max(counts) * (len(bars) - 1)))] for c in counts)
+
+def summary(bins=BINS):
+    ''' return one line of text per stage, for printing or drawing on screen '''
+    return [f'{name:20} {s.last * 1000:8.3f} ms {s.mean * 1000:8.3f} avg {s.calls:8} calls {sparkline(s, bins)}'
+            for name, s in list(stages.items())]
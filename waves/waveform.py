@@ -0,0 +1,104 @@
+# periodic functions of time built from a few numbers, used for driving the strings,
+# as model waves and as the spring schedules of the replica
+#
+# a waveform is described by a spec, {"shape": ..., "amp": ..., "freq": ..., "phase": ..., "offset": ...},
+# so scenario files can give them and they can be pickled to worker processes
+
+
+
+### IMPORTS
+
+import math
+
+
+
+### SHAPES
+
+# shapes of one cycle, taking the position in the cycle (0 to 1, repeating) and returning -1 to 1
+SHAPES = dict()
+
+def shape(name):
+    ''' register a cycle shape under a name for waveform specs to use '''
+    def register(func):
+        SHAPES[name] = func
+        return func
+    return register
+
+@shape('sine')
+def sine(x):
+    return math.sin(x * 2 * math.pi)
+
+@shape('sawtooth')
+def sawtooth(x):
+    return (x % 1) * 2 - 1
+
+@shape('square')
+def square(x):
+    return 1 if x % 1 < .5 else -1
+
+@shape('pulse')
+def pulse(x):
+    return 1 # held for as long as the waveform is on, use start and stop to make it a pulse
+
+
+
+### WAVEFORMS
+
+class Waveform:
+    ''' a function of time: offset + amp * shape((t + phase) * freq) between start and stop, and offset outside them
+
+    with harmonics > 1 it is the sum of that many overtones, the nth at n times the frequency and 1/n ** falloff the amplitude
+
+    unlike a lambda this can be pickled, so it can be sent to worker processes
+    '''
+
+    def __init__(self, shape='sine', amp=1, freq=1, phase=0, offset=0, start=None, stop=None, harmonics=1, falloff=1):
+        if shape not in SHAPES:
+            raise ValueError(f'unknown waveform shape {shape!r}, expected one of {", ".join(SHAPES)}')
+        self.shape = shape
+        self.amp = amp
+        self.freq = freq
+        self.phase = phase # in seconds
+        self.offset = offset
+        self.start = start
+        self.stop = stop
+        self.harmonics = harmonics
+        self.falloff = falloff
+
+        # most waveforms are one shape that is always on, which are called without the checks or the shape lookup
+        # (the spring schedules are called twice a sample), and a plain sine is worked out in radians straight from t
+        self.plain = harmonics == 1 and start is None and stop is None
+        self.sine = self.plain and shape == 'sine'
+        self.func = SHAPES[shape]
+        self.scale = 2 * math.pi * freq
+        self.shift = 2 * math.pi * freq * phase
+
+    def cycle(self, x):
+        ''' return the unscaled shape at a position in the cycle, overtones and all '''
+        func = SHAPES[self.shape]
+        if self.harmonics == 1:
+            return func(x)
+        return sum(func(x * n) / n ** self.falloff for n in range(1, self.harmonics + 1))
+
+    def series(self):
+        ''' return one waveform per overtone, for drawing them separately '''
+        return [Waveform(self.shape, self.amp / n ** self.falloff, self.freq * n, self.phase, self.offset, self.start, self.stop)
+                for n in range(1, self.harmonics + 1)]
+
+    def __call__(self, t):
+        if self.sine:
+            return self.offset + self.amp * math.sin(t * self.scale + self.shift)
+        if self.plain:
+            return self.offset + self.amp * self.func((t + self.phase) * self.freq)
+        if (self.start is not None and t < self.start) or (self.stop is not None and t >= self.stop):
+            return self.offset
+        return self.offset + self.amp * self.cycle((t + self.phase) * self.freq)
+
+    def __repr__(self):
+        return f'Waveform({self.shape!r}, amp={self.amp:g}, freq={self.freq:g}, phase={self.phase:g}, offset={self.offset:g})'
+
+def waveform(spec):
+    ''' return a Waveform from a spec dict, or a constant one from a plain number '''
+    if isinstance(spec, (int, float)):
+        return Waveform('pulse', amp=0, offset=spec)
+    return Waveform(**spec)